@@ -0,0 +1,33 @@
+"""add gist indexes on artists.location for nearby search
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """GiST on location (what geoalchemy2 creates for new databases) plus a
+    partial GiST over bookable artists only, used by /artists/nearby."""
+    op.execute("CREATE INDEX IF NOT EXISTS idx_artists_location ON artists USING gist (location)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_artists_bookable_location ON artists USING gist (location) "
+        "WHERE is_active AND kyc_verified AND profile_completed"
+    )
+
+
+def downgrade() -> None:
+    """Drop the partial index; idx_artists_location may predate this revision, so it stays."""
+    op.execute("DROP INDEX IF EXISTS ix_artists_bookable_location")
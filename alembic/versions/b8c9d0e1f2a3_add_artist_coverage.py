@@ -0,0 +1,59 @@
+"""add trigger-maintained travel coverage polygon to artists
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """coverage = ST_Buffer(location, travel_radius km), kept current by a
+    BEFORE INSERT/UPDATE trigger, with a partial GiST index over bookable artists."""
+    op.execute("ALTER TABLE artists ADD COLUMN IF NOT EXISTS coverage geography(POLYGON, 4326)")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION artists_set_coverage() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.location IS NULL THEN
+                NEW.coverage := NULL;
+            ELSE
+                NEW.coverage := ST_Buffer(NEW.location, COALESCE(NEW.travel_radius, 10) * 1000.0, 'quad_segs=16');
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS artists_coverage ON artists")
+    op.execute("""
+        CREATE TRIGGER artists_coverage
+        BEFORE INSERT OR UPDATE OF location, travel_radius ON artists
+        FOR EACH ROW EXECUTE FUNCTION artists_set_coverage()
+    """)
+    # Backfill existing rows
+    op.execute(
+        "UPDATE artists SET coverage = ST_Buffer(location, COALESCE(travel_radius, 10) * 1000.0, 'quad_segs=16') "
+        "WHERE location IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_artists_bookable_coverage ON artists USING gist (coverage) "
+        "WHERE is_active AND kyc_verified AND profile_completed"
+    )
+
+
+def downgrade() -> None:
+    """Drop the index, trigger, function and column."""
+    op.execute("DROP INDEX IF EXISTS ix_artists_bookable_coverage")
+    op.execute("DROP TRIGGER IF EXISTS artists_coverage ON artists")
+    op.execute("DROP FUNCTION IF EXISTS artists_set_coverage()")
+    op.drop_column('artists', 'coverage')
@@ -0,0 +1,53 @@
+"""add gin indexes on artist tag arrays and facet counts view
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d0e1f2a3b4'
+down_revision: Union[str, None] = 'b8c9d0e1f2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TAG_COLUMNS = ["skills", "event_types", "profession", "travel_willingness"]
+
+
+def upgrade() -> None:
+    """Partial GIN indexes (bookable artists) for @> / && filters, plus the
+    artist_tag_facets materialized view with the unique index that
+    REFRESH ... CONCURRENTLY needs."""
+    for column in TAG_COLUMNS:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_artists_{column}_gin ON artists USING gin ({column}) "
+            f"WHERE is_active AND kyc_verified AND profile_completed"
+        )
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS artist_tag_facets AS
+        SELECT t.attribute, t.value, count(DISTINCT artists.id)::int AS artists
+        FROM artists,
+        LATERAL (
+            SELECT 'skills' AS attribute, unnest(artists.skills) AS value
+            UNION ALL SELECT 'event_types', unnest(artists.event_types)
+            UNION ALL SELECT 'profession', unnest(artists.profession)
+            UNION ALL SELECT 'travel_willingness', unnest(artists.travel_willingness)
+        ) AS t
+        WHERE artists.is_active AND artists.kyc_verified AND artists.profile_completed
+        GROUP BY t.attribute, t.value
+    """)
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_artist_tag_facets ON artist_tag_facets (attribute, value)")
+
+
+def downgrade() -> None:
+    """Drop the facet view and the GIN indexes."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS artist_tag_facets")
+    for column in TAG_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_artists_{column}_gin")
@@ -0,0 +1,151 @@
+"""dictionary-encode artist tag arrays as smallint codes
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0e1f2a3b4c5'
+down_revision: Union[str, None] = 'c9d0e1f2a3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TAG_COLUMNS = ["skills", "event_types", "profession", "travel_willingness"]
+BATCH_SIZE = 1000
+BOOKABLE = "is_active AND kyc_verified AND profile_completed"
+
+ENCODE = """CASE WHEN artists.{column} IS NULL THEN NULL ELSE ARRAY(
+    SELECT t.id FROM unnest(artists.{column}) WITH ORDINALITY AS u(value, ord)
+    JOIN artist_tags AS t ON t.attribute = '{column}' AND t.value = u.value
+    ORDER BY u.ord
+) END"""
+DECODE = """CASE WHEN artists.{column} IS NULL THEN NULL ELSE ARRAY(
+    SELECT t.value FROM unnest(artists.{column}) WITH ORDINALITY AS u(code, ord)
+    JOIN artist_tags AS t ON t.id = u.code
+    ORDER BY u.ord
+) END::varchar[]"""
+
+FACETS_BY_CODE = """
+    CREATE MATERIALIZED VIEW artist_tag_facets AS
+    SELECT tags.attribute, tags.value, count(DISTINCT artists.id)::int AS artists
+    FROM artists
+    CROSS JOIN LATERAL unnest(
+        artists.skills || artists.event_types || artists.profession || artists.travel_willingness
+    ) AS code
+    JOIN artist_tags AS tags ON tags.id = code
+    WHERE artists.is_active AND artists.kyc_verified AND artists.profile_completed
+    GROUP BY tags.attribute, tags.value
+"""
+FACETS_BY_VALUE = """
+    CREATE MATERIALIZED VIEW artist_tag_facets AS
+    SELECT t.attribute, t.value, count(DISTINCT artists.id)::int AS artists
+    FROM artists,
+    LATERAL (
+        SELECT 'skills' AS attribute, unnest(artists.skills) AS value
+        UNION ALL SELECT 'event_types', unnest(artists.event_types)
+        UNION ALL SELECT 'profession', unnest(artists.profession)
+        UNION ALL SELECT 'travel_willingness', unnest(artists.travel_willingness)
+    ) AS t
+    WHERE artists.is_active AND artists.kyc_verified AND artists.profile_completed
+    GROUP BY t.attribute, t.value
+"""
+
+
+def _register_tags() -> None:
+    for column in TAG_COLUMNS:
+        op.execute(
+            f"INSERT INTO artist_tags (attribute, value) "
+            f"SELECT DISTINCT '{column}', unnest({column}) FROM artists "
+            f"ON CONFLICT (attribute, value) DO NOTHING"
+        )
+
+
+def _assignments(template: str) -> str:
+    return ", ".join(f"{column}_new = {template.format(column=column)}" for column in TAG_COLUMNS)
+
+
+def _backfill(template: str) -> None:
+    """Fill the *_new columns from the current ones, BATCH_SIZE rows per committed statement."""
+    bind = op.get_bind()
+    statement = sa.text(f"""
+        WITH batch AS (
+            SELECT id FROM artists WHERE id > CAST(:last_id AS uuid) ORDER BY id LIMIT :batch_size
+        )
+        UPDATE artists SET {_assignments(template)}
+        FROM batch WHERE artists.id = batch.id
+        RETURNING artists.id::text
+    """)
+    last_id = "00000000-0000-0000-0000-000000000000"
+    with op.get_context().autocommit_block():
+        while True:
+            ids = bind.execute(statement, {"last_id": last_id, "batch_size": BATCH_SIZE}).scalars().all()
+            if not ids:
+                break
+            last_id = max(ids)  # lowercase canonical text sorts like the uuid itself
+
+
+def _swap_columns() -> None:
+    """Replace each tag column with its *_new column and rebuild the GIN indexes."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS artist_tag_facets")
+    for column in TAG_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_artists_{column}_gin")
+        op.execute(f"ALTER TABLE artists DROP COLUMN {column}")
+        op.execute(f"ALTER TABLE artists RENAME COLUMN {column}_new TO {column}")
+        op.execute(
+            f"CREATE INDEX ix_artists_{column}_gin ON artists USING gin ({column}) WHERE {BOOKABLE}"
+        )
+
+
+def upgrade() -> None:
+    """artist_tags dictionary; skills / event_types / profession /
+    travel_willingness become SMALLINT[] codes into it.
+
+    Existing rows are encoded in committed batches into side columns while
+    the old ones stay readable. The swap then runs in one transaction,
+    re-encoding rows updated during the backfill before the old columns go."""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS artist_tags (
+            id smallserial PRIMARY KEY,
+            attribute varchar NOT NULL,
+            value varchar NOT NULL,
+            CONSTRAINT uq_artist_tags_attribute_value UNIQUE (attribute, value)
+        )
+    """)
+    _register_tags()
+    for column in TAG_COLUMNS:
+        op.execute(f"ALTER TABLE artists ADD COLUMN IF NOT EXISTS {column}_new smallint[]")
+
+    started = op.get_bind().scalar(sa.text("SELECT now() AT TIME ZONE 'utc'"))
+    _backfill(ENCODE)
+
+    # Catch up on rows written while the batches ran, holding off further writes
+    op.execute("LOCK TABLE artists IN SHARE ROW EXCLUSIVE MODE")
+    _register_tags()
+    op.get_bind().execute(
+        sa.text(f"UPDATE artists SET {_assignments(ENCODE)} WHERE updated_at >= :started"),
+        {"started": started},
+    )
+    _swap_columns()
+    op.execute(FACETS_BY_CODE)
+    op.execute("CREATE UNIQUE INDEX ix_artist_tag_facets ON artist_tag_facets (attribute, value)")
+
+
+def downgrade() -> None:
+    """Decode the tag columns back to VARCHAR[] and drop artist_tags."""
+    for column in TAG_COLUMNS:
+        op.execute(f"ALTER TABLE artists ADD COLUMN IF NOT EXISTS {column}_new varchar[]")
+    _backfill(DECODE)
+
+    op.execute("LOCK TABLE artists IN SHARE ROW EXCLUSIVE MODE")
+    _swap_columns()
+    op.execute(FACETS_BY_VALUE)
+    op.execute("CREATE UNIQUE INDEX ix_artist_tag_facets ON artist_tag_facets (attribute, value)")
+    op.execute("DROP TABLE IF EXISTS artist_tags")
@@ -0,0 +1,39 @@
+"""add pg_trgm indexes for artist name/username/bio search
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f2a3b4c5d6'
+down_revision: Union[str, None] = 'd0e1f2a3b4c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_COLUMNS = ["name", "username", "bio"]
+
+
+def upgrade() -> None:
+    """pg_trgm plus partial trigram GIN indexes (bookable artists) serving
+    the %> word-similarity matches of /artists/search."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in SEARCH_COLUMNS:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_artists_{column}_trgm ON artists "
+            f"USING gin ({column} gin_trgm_ops) "
+            f"WHERE is_active AND kyc_verified AND profile_completed"
+        )
+
+
+def downgrade() -> None:
+    """Drop the trigram indexes; the extension may be used elsewhere, so it stays."""
+    for column in SEARCH_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_artists_{column}_trgm")
@@ -0,0 +1,30 @@
+"""add expires_at index to otp tables
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index expires_at so the OTP reaper's range delete doesn't scan the table."""
+    op.execute("CREATE INDEX IF NOT EXISTS ix_email_otps_expires_at ON email_otps (expires_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_email_artist_otps_expires_at ON email_artist_otps (expires_at)")
+
+
+def downgrade() -> None:
+    """Drop the OTP expires_at indexes."""
+    op.execute("DROP INDEX IF EXISTS ix_email_artist_otps_expires_at")
+    op.execute("DROP INDEX IF EXISTS ix_email_otps_expires_at")
@@ -0,0 +1,41 @@
+"""add created_at and latest-otp index to otp tables
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OTP_TABLES = ["email_otps", "email_artist_otps"]
+
+
+def upgrade() -> None:
+    """Add created_at (naive UTC, like the other timestamps) and an (email, created_at DESC) index."""
+    for table in OTP_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS created_at TIMESTAMP "
+            f"NOT NULL DEFAULT (now() AT TIME ZONE 'utc')"
+        )
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_email_created_at "
+            f"ON {table} (email, created_at DESC)"
+        )
+
+
+def downgrade() -> None:
+    """Drop the latest-otp index and created_at column."""
+    for table in OTP_TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_email_created_at")
+        op.drop_column(table, 'created_at')
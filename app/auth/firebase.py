@@ -1,13 +1,64 @@
 import firebase_admin
-from firebase_admin import credentials, auth
+from firebase_admin import credentials
 import jwt
+import os
+import time
+
+from app.auth.utils.jwks import firebase_key_cache
+from app.auth.utils.token_cache import TokenCache
 
 cred = credentials.Certificate("serviceAccountKey.json")
 firebase_admin.initialize_app(cred)
 
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID") or cred.project_id
+FIREBASE_ISSUER = f"https://securetoken.google.com/{FIREBASE_PROJECT_ID}"
+CLOCK_SKEW_SECONDS = 5
+
+# Decoded claims of recently verified tokens, reused until each token's exp
+verified_token_cache = TokenCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+
+
+def _verify_id_token_locally(token: str, key) -> dict:
+    """Check signature, aud, iss, exp/iat and sub against an already-loaded key."""
+    decoded = jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        audience=FIREBASE_PROJECT_ID,
+        issuer=FIREBASE_ISSUER,
+        leeway=CLOCK_SKEW_SECONDS,
+        options={"require": ["exp", "iat", "aud", "iss", "sub"]},
+    )
+
+    sub = decoded.get("sub")
+    if not isinstance(sub, str) or not sub or len(sub) > 128:
+        raise jwt.InvalidTokenError("Firebase ID token has an invalid 'sub' claim")
+
+    auth_time = decoded.get("auth_time")
+    if auth_time is not None and auth_time > time.time() + CLOCK_SKEW_SECONDS:
+        raise jwt.InvalidTokenError("Firebase ID token has a future 'auth_time' claim")
+
+    # Match the shape returned by firebase_admin.auth.verify_id_token
+    decoded["uid"] = sub
+    return decoded
+
+
 def verify_firebase_token(token: str):
-    """Verify Firebase ID token (for Google OAuth)"""
-    return auth.verify_id_token(token, clock_skew_seconds=5)
+    """
+    Verify Firebase ID token (for Google OAuth).
+
+    Checked against the in-memory Google signing keys only, so verification
+    never waits on a certificate download. A kid the cache doesn't have (keys
+    rotated, or not loaded yet) rejects the token and wakes the background
+    refresher; keys past their max-age are still used while it catches up.
+    """
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = firebase_key_cache.get_key(kid)
+    if key is None or not firebase_key_cache.is_fresh:
+        firebase_key_cache.request_refresh()
+    if key is None:
+        raise jwt.InvalidTokenError("Firebase ID token has an unknown 'kid' header")
+    return _verify_id_token_locally(token, key)
 
 def verify_custom_token(token: str):
     """
@@ -20,16 +71,84 @@ def verify_custom_token(token: str):
     except Exception as e:
         raise Exception(f"Invalid custom token: {str(e)}")
 
-def verify_token(token: str):
+class VerifierStats:
+    """Call, failure and latency counters for one registered verifier."""
+
+    __slots__ = ("calls", "failures", "total_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_ms": (self.total_seconds / self.calls * 1000) if self.calls else 0.0,
+        }
+
+
+# Ordered (name, matches(header, claims), verify(token)) entries; first match wins
+_token_verifiers = []
+verifier_stats: dict[str, VerifierStats] = {}
+
+
+def register_verifier(name: str, matches, verify):
+    """Register a token verifier, routed to when `matches(header, claims)` is true."""
+    _token_verifiers.append((name, matches, verify))
+    verifier_stats[name] = VerifierStats()
+
+
+def _is_firebase_id_token(header: dict, claims: dict) -> bool:
+    return str(claims.get("iss", "")).startswith("https://securetoken.google.com/")
+
+
+# Firebase ID tokens (Google OAuth / phone auth) are issued by securetoken.google.com
+register_verifier("firebase_id", _is_firebase_id_token, verify_firebase_token)
+# Everything else is treated as one of our custom tokens (email/phone OTP)
+register_verifier("custom", lambda header, claims: True, verify_custom_token)
+
+
+def _verify_token_uncached(token: str):
     """
-    Verify token - tries Firebase ID token first, then custom token.
-    This supports both Google OAuth (Firebase ID) and email/phone OTP (custom token).
+    Verify token by routing it straight to the matching verifier.
+    The unverified header and claims are read once to pick between
+    Firebase ID tokens (Google OAuth) and custom tokens (email/phone OTP),
+    so an OTP token never pays for a failed RSA verification first.
     Returns decoded token payload.
     """
     try:
-        # Try Firebase ID token first (for Google OAuth)
-        return verify_firebase_token(token)
-    except:
-        # Fallback to custom token (for email/phone OTP)
-        return verify_custom_token(token)
+        header = jwt.get_unverified_header(token)
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError as e:
+        raise Exception(f"Malformed token: {str(e)}")
+
+    for name, matches, verify in _token_verifiers:
+        if not matches(header, claims):
+            continue
+        stats = verifier_stats[name]
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            return verify(token)
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            stats.total_seconds += time.perf_counter() - started
+
+    raise Exception("Unsupported token type")
+
+def verify_token(token: str):
+    """
+    Verify token, reusing the claims of a previous successful verification
+    of the same token until its exp. Failed verifications are never cached.
+    """
+    decoded = verified_token_cache.get(token)
+    if decoded is not None:
+        return decoded
 
+    decoded = _verify_token_uncached(token)
+    verified_token_cache.put(token, decoded)
+    return decoded
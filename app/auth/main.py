@@ -1,26 +1,30 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.responses import JSONResponse
-from app.auth.database import Base, engine
-from app.auth.routes import router as auth_router, artist_router
+from app.auth.database import Base, async_engine
+from app.auth.routes import router as auth_router, artist_router, discovery_router
+from app.auth.utils.jwks import firebase_key_cache
+from app.auth.utils.otp_reaper import otp_reaper
+from app.auth.utils.email_queue import EmailQueueFull
+from app.auth.utils.send_email import email_dispatcher
+from app.auth.utils import geocode
+from app.auth.utils.http_clients import http_clients, upstream_client
+from app.auth.utils.offline_geocoder import offline_geocoder
+from app.auth.utils.artist_index import artist_index
+from app.auth.utils.tag_dictionary import tag_dictionary
+from app.auth.utils.facets import facet_store
+from app.auth.utils.upstream_scheduler import UpstreamBusy, retry_after_header
+from app.auth.utils.rate_limit import (
+    RATE_LIMIT_TABLE_SIZE, RateLimitMiddleware, RouteLimits, rate_limit
+)
+from app.auth.utils.rate_limit_storage import RATE_LIMIT_STORAGE_URI
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-import threading
+import asyncio
 import os
 import httpx
 
-# Function to get the real user IP behind a proxy (Cloud Run / Load Balancer)
-def get_real_user_ip(request: Request):
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0]
-    return request.client.host
-
 # Initialize rate limiter
-# Uses client IP address for rate limiting (proxy-aware)
-limiter = Limiter(key_func=get_real_user_ip, default_limits=["100/minute"])
+# Uses client IP address for rate limiting (proxy-aware, see utils/rate_limit.get_real_user_ip)
+route_limits = RouteLimits(default="100/minute")
 
 app = FastAPI(title="Mimora Auth Service")
 
@@ -32,9 +36,18 @@ origins = [
 ]
 
 # Add rate limiter FIRST (will be innermost middleware)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(
+    RateLimitMiddleware,
+    route_limits=route_limits,
+    capacity=RATE_LIMIT_TABLE_SIZE,       # bounded LRU of per-client GCRA state
+    storage_uri=RATE_LIMIT_STORAGE_URI,   # shared across workers when set to mimora+redis://
+)
+
+# Email queue at capacity -> ask the client to retry instead of a 500
+async def _email_queue_full_handler(request: Request, exc: EmailQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+app.add_exception_handler(EmailQueueFull, _email_queue_full_handler)
 
 # Add CORS middleware LAST (outermost) so preflight OPTIONS requests are handled
 # before any other middleware can reject them
@@ -47,46 +60,93 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-def on_startup():
-    # Run database table creation in a background thread so it doesn't block app startup
-    def create_tables():
+async def on_startup():
+    # Resolve every route's rate limit once instead of per request
+    route_limits.build(app.routes)
+
+    # Run database table creation in a background task so it doesn't block app startup
+    async def create_tables():
         try:
             print("Starting table creation in background...")
-            Base.metadata.create_all(bind=engine)
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
             print("Table 'customer' created successfully!")
         except Exception as e:
             print(f"Error creating tables: {e}")
     
-    threading.Thread(target=create_tables, daemon=True).start()
+    # Keep a reference so the task isn't garbage collected mid-flight
+    app.state.create_tables_task = asyncio.create_task(create_tables())
+
+    # Pooled outbound HTTP clients (Nominatim, Meon, SendGrid, Google)
+    await http_clients.start()
+
+    # Local boundary index for /geocode/reverse (no-op unless GEOCODE_OFFLINE_DATASET is set)
+    await offline_geocoder.start()
+
+    # Paces calls to Nominatim (1 req/s usage policy)
+    await geocode.nominatim_scheduler.start()
+
+    # Keep Google's token-signing keys warm so ID tokens verify without network I/O
+    await firebase_key_cache.start()
+
+    # Periodically bulk-delete expired OTP rows off the request path
+    await otp_reaper.start()
+
+    # Code map for the artists' tag arrays; loaded before anything decodes artist rows
+    await tag_dictionary.start()
+
+    # In-memory index of bookable artists for /artists/nearby
+    await artist_index.start()
+
+    # Periodic refresh of the /artists/facets counts
+    await facet_store.start()
+
+    # Workers that deliver queued OTP emails
+    await email_dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await firebase_key_cache.stop()
+    await otp_reaper.stop()
+    await email_dispatcher.stop()
+    await geocode.nominatim_scheduler.stop()
+    await artist_index.stop()
+    await tag_dictionary.stop()
+    await facet_store.stop()
+    # Close pooled HTTP connections after everything that uses them has stopped
+    await http_clients.stop()
+    # Close pooled asyncpg connections cleanly
+    await async_engine.dispose()
 
 app.include_router(auth_router)
 app.include_router(artist_router)
+app.include_router(discovery_router)
 
 
 # ============ Reverse Geocoding Proxy ============
 # Proxies Nominatim requests server-side to avoid browser CORS restrictions
 @app.get("/geocode/reverse")
-@limiter.limit("30/minute")
-async def reverse_geocode(request: Request, lat: float, lon: float):
-    """Proxy reverse geocoding via Nominatim (server-side, no CORS issues)."""
+@rate_limit("30/minute")
+async def reverse_geocode(
+    request: Request,
+    lat: float,
+    lon: float,
+    client: httpx.AsyncClient = Depends(upstream_client("nominatim")),
+):
+    """Proxy reverse geocoding via Nominatim (server-side, no CORS issues).
+
+    Served from a geohash-cell cache; see utils/geocode.py.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://nominatim.openstreetmap.org/reverse",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "format": "json",
-                    "addressdetails": 1,
-                },
-                headers={
-                    "Accept-Language": "en",
-                    "User-Agent": "Mimora/1.0",  # Nominatim requires a User-Agent
-                },
-                timeout=10.0,
-            )
-            resp.raise_for_status()
-            return resp.json()
+        return await geocode.reverse_geocode(lat, lon, client=client)
+    except UpstreamBusy as e:
+        # Our own pacing said no: tell the client when to come back instead of a 502
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Geocoding service busy, please retry shortly"},
+            headers=retry_after_header(e),
+        )
     except Exception as e:
         return JSONResponse(
             status_code=502,
@@ -7,16 +7,22 @@ from sqlalchemy import (
     Float,
     Boolean,
     Integer,
+    SmallInteger,
     ForeignKey,
     ARRAY,
     DateTime,
     Text,
-   
+    Index,
+    DDL,
+    event,
+    UniqueConstraint,
+    text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from geoalchemy2 import Geography
 from app.auth.database import Base
+from app.auth.utils.tag_dictionary import TagCodes
 
 
 class User(Base):
@@ -52,11 +58,34 @@ class EmailOTP(Base):
     email = Column(String, nullable=False)
     username = Column(String, nullable=False)  # store username here
     otp_hash = Column(String, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    # "Latest OTP for this email" is a single index probe
+    __table_args__ = (
+        Index("ix_email_otps_email_created_at", email, created_at.desc()),
+    )
 
 
 #  ---------------------------------------------------------ARTIST------------------------------------------------------------------------------
 
+# Predicate of the partial indexes over bookable artists, for the index lists
+# built in Artist.__table_args__ (generator bodies can't see class attributes)
+_BOOKABLE_ARTISTS = text("is_active AND kyc_verified AND profile_completed")
+
+class ArtistTag(Base):
+    """Dictionary behind the artists' SMALLINT[] tag columns (utils/tag_dictionary.py)"""
+    __tablename__ = "artist_tags"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    attribute = Column(String, nullable=False)  # 'skills' | 'event_types' | 'profession' | 'travel_willingness'
+    value = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("attribute", "value", name="uq_artist_tags_attribute_value"),
+    )
+
+
 class Artist(Base):
     """Artist/Makeup Artist Model"""
     __tablename__ = "artists"
@@ -79,17 +108,18 @@ class Artist(Base):
     profile_pic_url = Column(String, nullable=True)  # Firebase Storage URL
     
     # Professional Details
-    profession = Column(ARRAY(String), default=list)  # ["Bridal Makeup", "Party Makeup"]
+    profession = Column(TagCodes("profession"), default=list)  # ["Bridal Makeup", "Party Makeup"]
     experience = Column(String, nullable=True)  # "beginner" | "intermediate" | "expert"
     how_did_you_learn = Column(String, nullable=True)  # "professional" | "self-learned" | "apprentice"
     certificate_url = Column(String, nullable=True)  # Certificate image URL
 
     # Booking Preferences (Step 2)
     booking_mode = Column(String, nullable=True)  # 'instant' | 'flexi' | 'both'
-    skills = Column(ARRAY(String), default=list)  # ['HD Makeup', 'Airbrush', ...]
-    event_types = Column(ARRAY(String), default=list)  # ['Wedding', 'Engagement', ...]
+    # Tag arrays are stored as artist_tags codes (utils/tag_dictionary.py)
+    skills = Column(TagCodes("skills"), default=list)  # ['HD Makeup', 'Airbrush', ...]
+    event_types = Column(TagCodes("event_types"), default=list)  # ['Wedding', 'Engagement', ...]
     service_location = Column(String, nullable=True)  # 'client' | 'studio' | 'both'
-    travel_willingness = Column(ARRAY(String), default=list)  # ['within-city', ...]
+    travel_willingness = Column(TagCodes("travel_willingness"), default=list)  # ['within-city', ...]
     studio_address = Column(Text, nullable=True)  # JSON string of studio address
     working_hours = Column(Text, nullable=True)  # JSON string of working hours
 
@@ -105,6 +135,10 @@ class Artist(Base):
     longitude = Column(Float, nullable=True)
     travel_radius = Column(Integer, default=10)  # in kilometers
     location = Column(Geography(geometry_type="POINT", srid=4326))
+    # ST_Buffer(location, travel_radius km); maintained by the artists_coverage trigger, never set directly.
+    # Deferred: only ever used in WHERE clauses, so plain select(Artist) doesn't ship the polygon.
+    # spatial_index=False: its only index is the partial GiST one below, as in migration b8c9d0e1f2a3
+    coverage = deferred(Column(Geography(geometry_type="POLYGON", srid=4326, spatial_index=False), nullable=True))
 
     # KYC Verification Status
     kyc_verified = Column(Boolean, default=False, index=True)
@@ -134,6 +168,49 @@ class Artist(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
 
+    # Nearby search only ever looks at bookable artists (utils/nearby.py)
+    __table_args__ = (
+        Index(
+            "ix_artists_bookable_location",
+            location,
+            postgresql_using="gist",
+            postgresql_where=(is_active & kyc_verified & profile_completed),
+        ),
+        # "Whose travel area contains this point" (utils/nearby.py find_serving_artists)
+        Index(
+            "ix_artists_bookable_coverage",
+            "coverage",
+            postgresql_using="gist",
+            postgresql_where=(is_active & kyc_verified & profile_completed),
+        ),
+        # @> / && tag filters (utils/artist_search.py)
+        *(
+            Index(
+                f"ix_artists_{name}_gin",
+                col,
+                postgresql_using="gin",
+                postgresql_where=_BOOKABLE_ARTISTS,
+            )
+            for name, col in (
+                ("skills", skills),
+                ("event_types", event_types),
+                ("profession", profession),
+                ("travel_willingness", travel_willingness),
+            )
+        ),
+        # Typo-tolerant name / username / bio search (utils/artist_search.py search_artists)
+        *(
+            Index(
+                f"ix_artists_{label}_trgm",
+                col,
+                postgresql_using="gin",
+                postgresql_ops={label: "gin_trgm_ops"},
+                postgresql_where=_BOOKABLE_ARTISTS,
+            )
+            for label, col in (("name", name), ("username", username), ("bio", bio))
+        ),
+    )
+
     def __repr__(self):
         return f"<Artist(id={self.id}, username={self.username}, kyc_verified={self.kyc_verified})>"
 
@@ -143,6 +220,31 @@ class Artist(Base):
         return self.kyc_verified and self.bank_verified
 
 
+# Keep artists.coverage in sync with location / travel_radius on databases
+# created through create_all (existing ones get this from alembic b8c9d0e1f2a3)
+_ARTIST_COVERAGE_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION artists_set_coverage() RETURNS trigger AS $$
+BEGIN
+    IF NEW.location IS NULL THEN
+        NEW.coverage := NULL;
+    ELSE
+        NEW.coverage := ST_Buffer(NEW.location, COALESCE(NEW.travel_radius, 10) * 1000.0, 'quad_segs=16');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""")
+_ARTIST_COVERAGE_TRIGGER = DDL("""
+CREATE TRIGGER artists_coverage
+BEFORE INSERT OR UPDATE OF location, travel_radius ON artists
+FOR EACH ROW EXECUTE FUNCTION artists_set_coverage()
+""")
+event.listen(Artist.__table__, "after_create", _ARTIST_COVERAGE_FUNCTION)
+# gin_trgm_ops for the search indexes (alembic e1f2a3b4c5d6 on existing databases)
+event.listen(Artist.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+event.listen(Artist.__table__, "after_create", _ARTIST_COVERAGE_TRIGGER)
+
+
 class EmailArtistOTP(Base):
     __tablename__ = "email_artist_otps"
 
@@ -150,7 +252,13 @@ class EmailArtistOTP(Base):
     email = Column(String, nullable=False)
     username = Column(String, nullable=False)  # store username here
     otp_hash = Column(String, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    # "Latest OTP for this email" is a single index probe
+    __table_args__ = (
+        Index("ix_email_artist_otps_email_created_at", email, created_at.desc()),
+    )
 
 
 class KYCRequest(Base):
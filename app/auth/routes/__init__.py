@@ -1,4 +1,5 @@
 from .routes import router
 from .artistroute import router as artist_router
+from .discovery import router as discovery_router
 
-__all__ = ["router", "artist_router"]
+__all__ = ["router", "artist_router", "discovery_router"]
@@ -6,7 +6,8 @@ app/auth/routes.py
 import logging
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Header, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 import httpx
 import os
@@ -15,8 +16,8 @@ import hashlib
 import json
 
 logger = logging.getLogger(__name__)
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from app.auth.utils.rate_limit import rate_limit
+from app.auth.utils.http_clients import upstream_client
 from app.auth.database import get_db
 from app.auth.models import Artist, KYCRequest, EmailArtistOTP, User
 from app.auth.schemas import (
@@ -26,15 +27,18 @@ from app.auth.schemas import (
     ArtistProfileCompleteRequest,EmailArtistOTPRequest
 )
 from app.auth.firebase import verify_firebase_token
-from app.auth.utils.otp import generate_otp, hash_otp, verify_otp, otp_expiry
-from app.auth.utils.send_email import send_otp_email
+from app.auth.utils.otp_store import otp_store, OTPVerificationError
+from app.auth.utils.send_email import send_new_otp
 from dotenv import load_dotenv
 from app.auth.utils.current_user import get_current_artist
+from app.auth.utils.identity import resolve_identity
+from app.auth.utils.principal_cache import ArtistPrincipal, artist_principals
+from app.auth.utils.artist_index import artist_index
+from app.auth.utils.tag_dictionary import tag_dictionary
 import firebase_admin
 from firebase_admin import auth as firebase_auth
 # Load environment variables from .env file
 load_dotenv()
-limiter = Limiter(key_func=get_remote_address)
 
 # # Debug: Print loaded variables
 # print(f"DEBUG - MEON_API_BASE_URL: {os.getenv('MEON_API_BASE_URL')}")
@@ -46,7 +50,7 @@ router = APIRouter()
 
 
 @router.get("/auth/artist/me", response_model=ArtistResponse)
-async def get_artist_profile(artist: Artist = Depends(get_current_artist)):
+async def get_artist_profile(artist: ArtistPrincipal = Depends(get_current_artist)):
     """
     Get the authenticated artist's full profile.
     
@@ -61,12 +65,16 @@ async def get_artist_profile(artist: Artist = Depends(get_current_artist)):
 @router.put("/auth/artist/location")
 async def update_artist_location(
     payload: UserLocationUpdate,
-    current_artist: Artist = Depends(get_current_artist),
-    db: Session = Depends(get_db)
+    principal: ArtistPrincipal = Depends(get_current_artist),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update authenticated artist's location and address
     """
+    current_artist = await db.get(Artist, principal.id)
+    if not current_artist:
+        raise HTTPException(status_code=404, detail="Artist not found")
+
     current_artist.latitude = payload.latitude
     current_artist.longitude = payload.longitude
     current_artist.flat_building = payload.flat_building
@@ -83,8 +91,10 @@ async def update_artist_location(
     # Update PostGIS geometry column
     current_artist.location = f"POINT({payload.longitude} {payload.latitude})"
 
-    db.commit()
-    db.refresh(current_artist)
+    await db.commit()
+    await db.refresh(current_artist)
+    artist_principals.invalidate(current_artist.id)
+    artist_index.upsert(current_artist)
 
     return current_artist
 
@@ -92,17 +102,20 @@ async def update_artist_location(
 @router.post("/auth/artist/register", response_model=ArtistResponse)
 async def become_artist(
     data: ArtistCreate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register new artist profile
     KYC verification will be done separately
     """
     # Check username availability
-    existing = db.query(Artist).filter(Artist.email == data.email).first()
+    existing = await db.scalar(select(Artist).where(Artist.email == data.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already taken")
     
+    # Tag arrays are stored as dictionary codes; register any new values first
+    await tag_dictionary.ensure(profession=data.profession)
+
     # Create artist profile - KYC starts as False
     artist = Artist(
         username=data.username,
@@ -129,18 +142,18 @@ async def become_artist(
     )
     
     db.add(artist)
-    db.commit()
-    db.refresh(artist)
+    await db.commit()
+    await db.refresh(artist)
     
     return artist
 
 
 @router.post("/auth/artist/check")
-@limiter.limit("10/minute")  # Rate limit: 10 checks per minute
+@rate_limit("10/minute")  # Rate limit: 10 checks per minute
 async def check_artist_exists(
     request: Request,
     payload: CheckUserRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Check if an artist exists by email or phone.
@@ -151,27 +164,19 @@ async def check_artist_exists(
         
         print(f"DEBUG check_artist_exists: type={payload.type}, identifier={payload.identifier}")
         
-        # Check Artist table first
         if payload.type == "email":
-            artist = db.query(Artist).filter(Artist.email == payload.identifier).first()
+            lookup = {"email": payload.identifier}
         elif payload.type == "phone":
-            artist = db.query(Artist).filter(Artist.phone_number == payload.identifier).first()
+            lookup = {"phone_number": payload.identifier}
         else:
             raise HTTPException(status_code=400, detail="Invalid type. Use 'email' or 'phone'")
         
-        if artist:
-            print(f"DEBUG: Found artist: {artist.id}")
-            return CheckUserResponse(exists=True, user_type="artist")
+        # Artist table takes priority over customer — both checked in one round trip
+        match = (await resolve_identity(db, tables=("artist", "customer"), **lookup)).first()
         
-        # Not an artist — check if they're a customer
-        if payload.type == "email":
-            customer = db.query(User).filter(User.email == payload.identifier).first()
-        else:
-            customer = db.query(User).filter(User.phone_number == payload.identifier).first()
-        
-        if customer:
-            print(f"DEBUG: Found customer: {customer.id}")
-            return CheckUserResponse(exists=True, user_type="customer")
+        if match:
+            print(f"DEBUG: Found {match.table}: {match.row.id}")
+            return CheckUserResponse(exists=True, user_type=match.table)
         
         print("DEBUG: User not found in either table")
         return CheckUserResponse(exists=False, user_type=None)
@@ -185,12 +190,12 @@ async def check_artist_exists(
 
 
 @router.post("/auth/artist/oauth", response_model=ArtistResponse)
-@limiter.limit("20/minute")  # Rate limit for OAuth login
+@rate_limit("20/minute")  # Rate limit for OAuth login
 async def oauth_login(
     request: Request,
     payload: ArtistOAuthRequest = ArtistOAuthRequest(),
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
   
     # Extract Bearer token
@@ -230,8 +235,9 @@ async def oauth_login(
             detail="Firebase UID not found in token"
         )
     
-    # Check if user exists by email
-    user = db.query(Artist).filter(Artist.email == email).first()
+    # Check if user exists by email - artist and customer tables in one round trip
+    resolution = await resolve_identity(db, email=email, tables=("artist", "customer"))
+    user = resolution.row("artist")
     
     if user:
         # Existing user - update if needed
@@ -252,12 +258,12 @@ async def oauth_login(
             updated = True
         
         if updated:
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
+            artist_principals.invalidate(user.id)
     else:
         # NEW: Check if email exists as Customer (prevent cross-account duplicates)
-        existing_customer = db.query(User).filter(User.email == email).first()
-        if existing_customer:
+        if resolution.first("customer"):
             raise HTTPException(
                 status_code=400,
                 detail="This email is registered as a customer account. Please use the customer login."
@@ -270,7 +276,7 @@ async def oauth_login(
             username = base_username
             # Ensure uniqueness
             counter = 1
-            while db.query(Artist).filter(Artist.username == username).first():
+            while await db.scalar(select(Artist).where(Artist.username == username)):
                 username = f"{base_username}{counter}"
                 counter += 1
 
@@ -289,8 +295,8 @@ async def oauth_login(
                 total_reviews=0
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         else:
             # Login mode - don't auto-create new artists
             raise HTTPException(
@@ -303,12 +309,12 @@ async def oauth_login(
 
 # ============ Phone OTP Auth (NEW) ============
 @router.post("/auth/artist/otp", response_model=ArtistResponse)
-@limiter.limit("20/minute")
+@rate_limit("20/minute")
 async def otp_auth(
     request: Request,
     payload: OTPRequest,
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Authenticate artist with Firebase phone OTP.
@@ -343,10 +349,12 @@ async def otp_auth(
     if not phone_number:
         raise HTTPException(status_code=400, detail="Phone number not found in token")
     
-    # Check if artist exists by phone number or firebase_uid
-    artist = db.query(Artist).filter(Artist.phone_number == phone_number).first()
-    if not artist:
-        artist = db.query(Artist).filter(Artist.firebase_uid == firebase_uid).first()
+    # Check if artist exists by phone number or firebase_uid (phone match wins)
+    resolution = await resolve_identity(
+        db, firebase_uid=firebase_uid, phone_number=phone_number, tables=("artist",)
+    )
+    match = resolution.first("artist", matched_on="phone_number") or resolution.first("artist")
+    artist = match.row if match else None
     
     if artist:
         # Existing artist - update firebase_uid and provider if needed
@@ -372,8 +380,9 @@ async def otp_auth(
             updated = True
         
         if updated:
-            db.commit()
-            db.refresh(artist)
+            await db.commit()
+            await db.refresh(artist)
+            artist_principals.invalidate(artist.id)
         
         print(f"Artist {artist.id} logged in via phone OTP")
     else:
@@ -391,8 +400,8 @@ async def otp_auth(
             total_reviews=0
         )
         db.add(artist)
-        db.commit()
-        db.refresh(artist)
+        await db.commit()
+        await db.refresh(artist)
         print(f"Created new artist {artist.id} via phone OTP")
     
     return artist
@@ -402,13 +411,17 @@ async def otp_auth(
 @router.put("/auth/artist/profile", response_model=ArtistResponse)
 async def complete_artist_profile(
     payload: ArtistProfileCompleteRequest,
-    current_artist: Artist = Depends(get_current_artist),
-    db: Session = Depends(get_db)
+    principal: ArtistPrincipal = Depends(get_current_artist),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Complete artist profile with additional details.
     Called after initial authentication to fill in all profile fields.
     """
+    current_artist = await db.get(Artist, principal.id)
+    if not current_artist:
+        raise HTTPException(status_code=404, detail="Artist not found")
+
     # Convert birthdate from DD/MM/YYYY to datetime
     if payload.birthdate:
         try:
@@ -425,19 +438,19 @@ async def complete_artist_profile(
         current_artist.name = payload.name
     if payload.username is not None:
         # Check username uniqueness
-        existing = db.query(Artist).filter(
+        existing = await db.scalar(select(Artist).where(
             Artist.username == payload.username,
             Artist.id != current_artist.id
-        ).first()
+        ))
         if existing:
             raise HTTPException(status_code=400, detail="Username already taken")
         current_artist.username = payload.username
     if payload.phone_number is not None:
         # Check phone uniqueness
-        existing = db.query(Artist).filter(
+        existing = await db.scalar(select(Artist).where(
             Artist.phone_number == payload.phone_number,
             Artist.id != current_artist.id
-        ).first()
+        ))
         if existing:
             raise HTTPException(status_code=400, detail="Phone number already registered")
         current_artist.phone_number = payload.phone_number
@@ -450,6 +463,14 @@ async def complete_artist_profile(
     if payload.profile_pic_url is not None:
         current_artist.profile_pic_url = payload.profile_pic_url
     
+    # Tag arrays are stored as dictionary codes; register any new values first
+    await tag_dictionary.ensure(
+        profession=payload.profession,
+        skills=payload.skills,
+        event_types=payload.event_types,
+        travel_willingness=payload.travel_willingness,
+    )
+
     # Update professional info
     if payload.how_did_you_learn is not None:
         current_artist.how_did_you_learn = payload.how_did_you_learn
@@ -506,6 +527,8 @@ async def complete_artist_profile(
     if payload.latitude is not None and payload.longitude is not None:
         current_artist.latitude = payload.latitude
         current_artist.longitude = payload.longitude
+        # Keep the PostGIS point in sync so nearby search sees the new position
+        current_artist.location = f"POINT({payload.longitude} {payload.latitude})"
     
     # Build address string from components
     addr_parts = [p for p in [
@@ -523,90 +546,51 @@ async def complete_artist_profile(
     if payload.mark_complete:
         current_artist.profile_completed = True
     
-    db.commit()
-    db.refresh(current_artist)
+    await db.commit()
+    await db.refresh(current_artist)
+    artist_principals.invalidate(current_artist.id)
+    artist_index.upsert(current_artist)
     print(f"Artist {current_artist.id} completed profile")
     
     return current_artist
 
 
 @router.post("/auth/artist/email")
-@limiter.limit("5/minute")  # Strict limit to prevent OTP spam
+@rate_limit("5/minute")  # Strict limit to prevent OTP spam
 async def email_signup(
     request: Request,
     payload: EmailArtistOTPRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
 
-    # Delete expired OTPs for this email
-    expired_otps = db.query(EmailArtistOTP).filter(
-        EmailArtistOTP.email == payload.email,
-        EmailArtistOTP.expires_at < datetime.utcnow()
-    ).all()
-    
-    if expired_otps:
-        for expired_otp in expired_otps:
-            db.delete(expired_otp)
-        db.commit()
-        print(f"Deleted {len(expired_otps)} expired OTP(s) for {payload.email}")
-    # 1️⃣ Generate OTP
-    otp = generate_otp()
-
-    # 2️⃣ Store OTP + username
-    otp_entry = EmailArtistOTP(
-        email=payload.email,
-        username=payload.username,
-        otp_hash=hash_otp(otp),
-        expires_at=otp_expiry()
-    )
-
-    db.add(otp_entry)
-    db.commit()
+    # Impatient re-taps reuse the code that was just sent
+    resend_after = await otp_store.resend_after(db, "artist", payload.email, payload.username)
+    if resend_after:
+        return {"message": "OTP already sent", "email": payload.email, "resend_after": resend_after}
 
-    # 3️⃣ Send OTP email
-    send_otp_email(payload.email, otp)
+    # Queue the OTP email, then store OTP + username
+    await send_new_otp(db, "artist", payload.email, payload.username)
 
     return {"message": "OTP sent to your email", "email": payload.email}
 
 
 @router.post("/auth/artist/email/verify", response_model=ArtistResponse)
-@limiter.limit("10/minute")  # Prevent brute-force OTP guessing
+@rate_limit("10/minute")  # Prevent brute-force OTP guessing
 async def verify_email_otp(
     request: Request,
     payload: ArtistVerifyOTPRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # 1️⃣ Get the latest OTP record for this email
-    otp_record = (
-        db.query(EmailArtistOTP)
-        .filter(EmailArtistOTP.email == payload.email)
-        .order_by(EmailArtistOTP.id.desc())
-        .first()
-    )
-
-    if not otp_record:
-        print(f"DEBUG: OTP not found for email {payload.email}")
-        raise HTTPException(status_code=400, detail="OTP not found")
-
-    # 2️⃣ Check expiry
-    if otp_record.expires_at < datetime.utcnow():
-        print(f"DEBUG: OTP expired for {payload.email}. Expires: {otp_record.expires_at}, Now: {datetime.utcnow()}")
-        raise HTTPException(status_code=400, detail="OTP expired")
-
-    # 3️⃣ Verify OTP
-    if not verify_otp(payload.otp, otp_record.otp_hash):
-        print(f"DEBUG: Invalid OTP for {payload.email}. Provided: {payload.otp}")
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-
-    # 4️⃣ Get the username from OTP record
-    username = otp_record.username
-
-    # 5️⃣ Delete the used OTP
-    db.delete(otp_record)
-    db.commit()
+    # 1️⃣-5️⃣ Check expiry, verify and consume the latest OTP for this email;
+    # the username comes from the OTP record
+    try:
+        username = await otp_store.consume(db, "artist", payload.email, payload.otp)
+    except OTPVerificationError as e:
+        print(f"DEBUG: OTP verification failed for {payload.email}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
 
     # 6️⃣ Check if user already exists
-    user = db.query(Artist).filter(Artist.email == payload.email).first()
+    user = await db.scalar(select(Artist).where(Artist.email == payload.email))
 
     if not user:
         # 7️⃣ Create user in Firebase
@@ -636,8 +620,8 @@ async def verify_email_otp(
             total_reviews=0
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
     # 9️⃣ Generate Firebase Custom Token
     try:
@@ -652,11 +636,11 @@ async def verify_email_otp(
 
 
 @router.post("/auth/artist/email/login")
-@limiter.limit("5/minute")
+@rate_limit("5/minute")
 async def email_login(
     request: Request,
     payload: EmailLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     LOGIN: Send OTP to email (email only, no username needed)
@@ -665,45 +649,26 @@ async def email_login(
     Response: {"message": "OTP sent to your email", "email": "user@example.com"}
     """
     # Check if artist exists
-    user = db.query(Artist).filter(Artist.email == payload.email).first()
+    user = await db.scalar(select(Artist).where(Artist.email == payload.email))
     if not user:
         raise HTTPException(status_code=404, detail="Email not registered. Please signup first.")
 
-    # Delete expired OTPs for this email
-    expired_otps = db.query(EmailArtistOTP).filter(
-        EmailArtistOTP.email == payload.email,
-        EmailArtistOTP.expires_at < datetime.utcnow()
-    ).all()
-    
-    if expired_otps:
-        for expired_otp in expired_otps:
-            db.delete(expired_otp)
-        db.commit()
-        print(f"Deleted {len(expired_otps)} expired OTP(s) for {payload.email}")
+    # Impatient re-taps reuse the code that was just sent
+    resend_after = await otp_store.resend_after(db, "artist", payload.email, user.username or user.name)
+    if resend_after:
+        return {"message": "OTP already sent", "email": payload.email, "resend_after": resend_after}
 
-    # Generate OTP
-    otp = generate_otp()
-    
-    # Store OTP with existing username
-    otp_entry = EmailArtistOTP(
-        email=payload.email,
-        username=user.username or user.name,
-        otp_hash=hash_otp(otp),
-        expires_at=otp_expiry()
-    )
-    db.add(otp_entry)
-    db.commit()
-    
-    # Send OTP email
-    send_otp_email(payload.email, otp)
+    # Queue the OTP email, then store it with the existing username
+    await send_new_otp(db, "artist", payload.email, user.username or user.name)
     
     return {"message": "OTP sent to your email", "email": payload.email}
 
 @router.post("/kyc/start/{artist_id}")
 async def start_kyc(
     artist_id: str,
-    current_artist: Artist = Depends(get_current_artist),
-    db: Session = Depends(get_db)
+    current_artist: ArtistPrincipal = Depends(get_current_artist),
+    db: AsyncSession = Depends(get_db),
+    meon: httpx.AsyncClient = Depends(upstream_client("meon")),
 ):
     """
     Initiate KYC process with Meon
@@ -715,7 +680,7 @@ async def start_kyc(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid artist ID format")
     
-    artist = db.query(Artist).filter(Artist.id == artist_uuid).first()
+    artist = await db.scalar(select(Artist).where(Artist.id == artist_uuid))
     if not artist:
         raise HTTPException(status_code=404, detail="Artist not found")
     
@@ -728,10 +693,10 @@ async def start_kyc(
         }
     
     # Check for existing in-progress KYC
-    existing_kyc = db.query(KYCRequest).filter(
+    existing_kyc = await db.scalar(select(KYCRequest).where(
         KYCRequest.artist_id == artist.id,
         KYCRequest.status.in_(["pending", "in_progress"])
-    ).first()
+    ))
     
     if existing_kyc and existing_kyc.provider_kyc_id:
         return {
@@ -749,102 +714,102 @@ async def start_kyc(
     )
     
     db.add(kyc_request)
-    db.commit()
-    db.refresh(kyc_request)
+    await db.commit()
+    await db.refresh(kyc_request)
     
     # Call Meon API to initiate Aadhar/PAN verification
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Meon SSO KYC Route API for Aadhar/PAN verification
-            base_url = os.getenv('MEON_API_BASE_URL', 'https://live.meon.co.in')
-            redirect_url = os.getenv('MEON_REDIRECT_URL', 'https://www.google.com')
-            
-            # Build request body per Meon documentation for analyst workflow
-            request_body = {
-                "company": os.getenv('MEON_COMPANY_NAME', 'mimora'),
-                "workflowName": os.getenv('MEON_KYC_WORKFLOW_NAME', 'analyst'),
-                "secret_key": os.getenv('MEON_SECRET_KEY'),
-                "notification": True,               
-                "unique_keys": {
-                    "artist_id": str(artist.id),
-                    "reference_id": str(kyc_request.id)
-                },
-                "is_redirect": True,
-                "redirect_url": redirect_url,
-            }
-            
-            meon_url = f"{base_url}/get_sso_kyc_route"
-            logger.info(f"Calling Meon SSO KYC API: {meon_url}")
-            
-            response = await client.post(
-                meon_url,
-                headers={"Content-Type": "application/json"},
-                json=request_body
-            )
-            
-            logger.info(f"Meon response status: {response.status_code}")
-            
-            if response.status_code in [200, 201]:
-                try:
-                    if not response.text:
-                        raise HTTPException(
-                            status_code=500,
-                            detail="Empty response from Meon API"
-                        )
-                    
-                    meon_data = response.json()
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse JSON response: {response.text}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Invalid response from Meon API: {response.text[:100]}"
-                    )
-                
-                # Check for API-level errors
-                if meon_data.get("success") == False or meon_data.get("status") == False:
-                    error_msg = meon_data.get("msg") or meon_data.get("message") or "Unknown error from Meon API"
-                    logger.error(f"Meon API error: {error_msg}")
-                    raise HTTPException(
-                        status_code=502,
-                        detail=f"Meon API error: {error_msg}"
-                    )
-                
-                # Extract SSO URL from response
-                # The response should contain the hosted KYC URL
-                kyc_url = (meon_data.get("sso_url") or meon_data.get("url") or 
-                          meon_data.get("link") or meon_data.get("redirect_url") or
-                          meon_data.get("data", {}).get("url"))
-                kyc_id = (meon_data.get("request_id") or meon_data.get("id") or 
-                         meon_data.get("kyc_id") or meon_data.get("session_id"))
-                
-                if not kyc_url:
-                    logger.warning(f"Meon response missing SSO URL: {meon_data}")
+        # Meon SSO KYC Route API for Aadhar/PAN verification
+        base_url = os.getenv('MEON_API_BASE_URL', 'https://live.meon.co.in')
+        redirect_url = os.getenv('MEON_REDIRECT_URL', 'https://www.google.com')
+        
+        # Build request body per Meon documentation for analyst workflow
+        request_body = {
+            "company": os.getenv('MEON_COMPANY_NAME', 'mimora'),
+            "workflowName": os.getenv('MEON_KYC_WORKFLOW_NAME', 'analyst'),
+            "secret_key": os.getenv('MEON_SECRET_KEY'),
+            "notification": True,               
+            "unique_keys": {
+                "artist_id": str(artist.id),
+                "reference_id": str(kyc_request.id)
+            },
+            "is_redirect": True,
+            "redirect_url": redirect_url,
+        }
+        
+        meon_url = f"{base_url}/get_sso_kyc_route"
+        logger.info(f"Calling Meon SSO KYC API: {meon_url}")
+        
+        response = await meon.post(
+            meon_url,
+            headers={"Content-Type": "application/json"},
+            json=request_body
+        )
+        
+        logger.info(f"Meon response status: {response.status_code}")
+        
+        if response.status_code in [200, 201]:
+            try:
+                if not response.text:
                     raise HTTPException(
                         status_code=500,
-                        detail=f"Meon API response missing SSO URL. Response: {meon_data}"
+                        detail="Empty response from Meon API"
                     )
                 
-                # Update KYC request
-                kyc_request.provider_kyc_id = kyc_id or str(kyc_request.id)
-                kyc_request.status = "in_progress"
-                if kyc_id:
-                    artist.kyc_id = kyc_id
-                
-                db.commit()
-                
-                return {
-                    "status": "initiated",
-                    "kyc_url": kyc_url,
-                    "kyc_id": kyc_id,
-                    "message": "KYC initiated successfully. Redirect user to kyc_url"
-                }
-            else:
-                logger.error(f"Meon API error response: {response.text}")
+                meon_data = response.json()
+            except json.JSONDecodeError:
+                logger.error(f"Failed to parse JSON response: {response.text}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Invalid response from Meon API: {response.text[:100]}"
+                )
+            
+            # Check for API-level errors
+            if meon_data.get("success") == False or meon_data.get("status") == False:
+                error_msg = meon_data.get("msg") or meon_data.get("message") or "Unknown error from Meon API"
+                logger.error(f"Meon API error: {error_msg}")
                 raise HTTPException(
                     status_code=502,
-                    detail=f"Meon API error ({response.status_code}): {response.text[:200]}"
+                    detail=f"Meon API error: {error_msg}"
                 )
-                
+            
+            # Extract SSO URL from response
+            # The response should contain the hosted KYC URL
+            kyc_url = (meon_data.get("sso_url") or meon_data.get("url") or 
+                      meon_data.get("link") or meon_data.get("redirect_url") or
+                      meon_data.get("data", {}).get("url"))
+            kyc_id = (meon_data.get("request_id") or meon_data.get("id") or 
+                     meon_data.get("kyc_id") or meon_data.get("session_id"))
+            
+            if not kyc_url:
+                logger.warning(f"Meon response missing SSO URL: {meon_data}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Meon API response missing SSO URL. Response: {meon_data}"
+                )
+            
+            # Update KYC request
+            kyc_request.provider_kyc_id = kyc_id or str(kyc_request.id)
+            kyc_request.status = "in_progress"
+            if kyc_id:
+                artist.kyc_id = kyc_id
+            
+            await db.commit()
+            artist_principals.invalidate(artist.id)
+            
+            return {
+                "status": "initiated",
+                "kyc_url": kyc_url,
+                "kyc_id": kyc_id,
+                "message": "KYC initiated successfully. Redirect user to kyc_url"
+            }
+        else:
+            logger.error(f"Meon API error response: {response.text}")
+            raise HTTPException(
+                status_code=502,
+                detail=f"Meon API error ({response.status_code}): {response.text[:200]}"
+            )
+            
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Meon API timeout. Please try again.")
     except httpx.RequestError as e:
@@ -859,8 +824,9 @@ async def start_kyc(
 @router.post("/kyc/face/{artist_id}")
 async def start_face_verification(
     artist_id: str,
-    current_artist: Artist = Depends(get_current_artist),
-    db: Session = Depends(get_db)
+    current_artist: ArtistPrincipal = Depends(get_current_artist),
+    db: AsyncSession = Depends(get_db),
+    meon: httpx.AsyncClient = Depends(upstream_client("meon")),
 ):
     """
     Initiate face/liveness verification with Meon
@@ -873,7 +839,7 @@ async def start_face_verification(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid artist ID format")
     
-    artist = db.query(Artist).filter(Artist.id == artist_uuid).first()
+    artist = await db.scalar(select(Artist).where(Artist.id == artist_uuid))
     if not artist:
         raise HTTPException(status_code=404, detail="Artist not found")
     
@@ -886,10 +852,10 @@ async def start_face_verification(
         }
     
     # Get the existing KYC request
-    kyc_request = db.query(KYCRequest).filter(
+    kyc_request = await db.scalar(select(KYCRequest).where(
         KYCRequest.artist_id == artist.id,
         KYCRequest.status.in_(["document_verified", "face_verification_pending"])
-    ).order_by(KYCRequest.created_at.desc()).first()
+    ).order_by(KYCRequest.created_at.desc()).limit(1))
     
     if not kyc_request:
         raise HTTPException(
@@ -915,94 +881,93 @@ async def start_face_verification(
     
     # Call Meon API to initiate face verification
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Meon SSO KYC Route API for face/liveness verification
-            base_url = os.getenv('MEON_API_BASE_URL', 'https://live.meon.co.in')
-            redirect_url = os.getenv('MEON_REDIRECT_URL', 'https://www.google.com')
-            
-            # Build request body for liveimage workflow
-            request_body = {
-                "company": os.getenv('MEON_COMPANY_NAME', 'mimora'),
-                "workflowName": os.getenv('MEON_FACE_WORKFLOW_NAME', 'image_verification'),
-                "secret_key": os.getenv('MEON_SECRET_KEY'),
-                "notification": True,        
-                "additional_info": {
-                    "image_captured": ""  # Will be captured by Meon's flow
-                },
-                "unique_keys": {
-                    "artist_id": str(artist.id),
-                    "reference_id": str(kyc_request.id)
-                },
-                "is_redirect": True,
-                "redirect_url": redirect_url,
-            }
-            
-            meon_url = f"{base_url}/get_sso_kyc_route"
-            logger.info(f"Calling Meon Face Verification API: {meon_url}")
-            
-            response = await client.post(
-                meon_url,
-                headers={"Content-Type": "application/json"},
-                json=request_body
-            )
-            
-            logger.info(f"Meon face response status: {response.status_code}")
-            
-            if response.status_code in [200, 201]:
-                try:
-                    if not response.text:
-                        raise HTTPException(
-                            status_code=500,
-                            detail="Empty response from Meon API"
-                        )
-                    
-                    meon_data = response.json()
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse face verification JSON: {response.text}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Invalid response from Meon API: {response.text[:100]}"
-                    )
-                
-                # Check for API-level errors
-                if meon_data.get("success") == False or meon_data.get("status") == False:
-                    error_msg = meon_data.get("msg") or meon_data.get("message") or "Unknown error from Meon API"
-                    logger.error(f"Meon face API error: {error_msg}")
-                    raise HTTPException(
-                        status_code=502,
-                        detail=f"Meon API error: {error_msg}"
-                    )
-                
-                # Extract SSO URL from response
-                face_url = (meon_data.get("sso_url") or meon_data.get("url") or 
-                          meon_data.get("link") or meon_data.get("redirect_url") or
-                          meon_data.get("data", {}).get("url"))
-                
-                if not face_url:
-                    logger.warning(f"Meon face response missing SSO URL: {meon_data}")
+        # Meon SSO KYC Route API for face/liveness verification
+        base_url = os.getenv('MEON_API_BASE_URL', 'https://live.meon.co.in')
+        redirect_url = os.getenv('MEON_REDIRECT_URL', 'https://www.google.com')
+        
+        # Build request body for liveimage workflow
+        request_body = {
+            "company": os.getenv('MEON_COMPANY_NAME', 'mimora'),
+            "workflowName": os.getenv('MEON_FACE_WORKFLOW_NAME', 'image_verification'),
+            "secret_key": os.getenv('MEON_SECRET_KEY'),
+            "notification": True,        
+            "additional_info": {
+                "image_captured": ""  # Will be captured by Meon's flow
+            },
+            "unique_keys": {
+                "artist_id": str(artist.id),
+                "reference_id": str(kyc_request.id)
+            },
+            "is_redirect": True,
+            "redirect_url": redirect_url,
+        }
+        
+        meon_url = f"{base_url}/get_sso_kyc_route"
+        logger.info(f"Calling Meon Face Verification API: {meon_url}")
+        
+        response = await meon.post(
+            meon_url,
+            headers={"Content-Type": "application/json"},
+            json=request_body
+        )
+        
+        logger.info(f"Meon face response status: {response.status_code}")
+        
+        if response.status_code in [200, 201]:
+            try:
+                if not response.text:
                     raise HTTPException(
                         status_code=500,
-                        detail=f"Meon API response missing SSO URL. Response: {meon_data}"
+                        detail="Empty response from Meon API"
                     )
                 
-                # Update KYC request status
-                kyc_request.status = "face_verification_pending"
-                kyc_request.updated_at = datetime.utcnow()
-                db.commit()
-                
-                return {
-                    "status": "initiated",
-                    "face_url": face_url,
-                    "kyc_id": str(kyc_request.provider_kyc_id),
-                    "message": "Face verification initiated. Redirect user to face_url"
-                }
-            else:
-                logger.error(f"Meon face API error response: {response.text}")
+                meon_data = response.json()
+            except json.JSONDecodeError:
+                logger.error(f"Failed to parse face verification JSON: {response.text}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Invalid response from Meon API: {response.text[:100]}"
+                )
+            
+            # Check for API-level errors
+            if meon_data.get("success") == False or meon_data.get("status") == False:
+                error_msg = meon_data.get("msg") or meon_data.get("message") or "Unknown error from Meon API"
+                logger.error(f"Meon face API error: {error_msg}")
                 raise HTTPException(
                     status_code=502,
-                    detail=f"Meon API error ({response.status_code}): {response.text[:200]}"
+                    detail=f"Meon API error: {error_msg}"
                 )
-                
+            
+            # Extract SSO URL from response
+            face_url = (meon_data.get("sso_url") or meon_data.get("url") or 
+                      meon_data.get("link") or meon_data.get("redirect_url") or
+                      meon_data.get("data", {}).get("url"))
+            
+            if not face_url:
+                logger.warning(f"Meon face response missing SSO URL: {meon_data}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Meon API response missing SSO URL. Response: {meon_data}"
+                )
+            
+            # Update KYC request status
+            kyc_request.status = "face_verification_pending"
+            kyc_request.updated_at = datetime.utcnow()
+            await db.commit()
+            
+            return {
+                "status": "initiated",
+                "face_url": face_url,
+                "kyc_id": str(kyc_request.provider_kyc_id),
+                "message": "Face verification initiated. Redirect user to face_url"
+            }
+        else:
+            logger.error(f"Meon face API error response: {response.text}")
+            raise HTTPException(
+                status_code=502,
+                detail=f"Meon API error ({response.status_code}): {response.text[:200]}"
+            )
+            
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Meon API timeout. Please try again.")
     except httpx.RequestError as e:
@@ -1018,7 +983,7 @@ async def start_face_verification(
 async def kyc_webhook(
     request: Request,
     x_meon_signature: str = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Webhook endpoint for Meon to send KYC verification results.
@@ -1083,17 +1048,17 @@ async def kyc_webhook(
     
     # Method 1: By provider_kyc_id (digitrans/clienttoken)
     if kyc_id:
-        kyc_request = db.query(KYCRequest).filter(
+        kyc_request = await db.scalar(select(KYCRequest).where(
             KYCRequest.provider_kyc_id == kyc_id
-        ).first()
+        ))
     
     # Method 2: By reference_id (our KYC request UUID)
     if not kyc_request and reference_id:
         try:
             ref_uuid = uuid.UUID(reference_id)
-            kyc_request = db.query(KYCRequest).filter(
+            kyc_request = await db.scalar(select(KYCRequest).where(
                 KYCRequest.id == ref_uuid
-            ).first()
+            ))
         except ValueError:
             pass
     
@@ -1101,30 +1066,30 @@ async def kyc_webhook(
     if not kyc_request and artist_id_from_payload:
         try:
             artist_uuid = uuid.UUID(artist_id_from_payload)
-            kyc_request = db.query(KYCRequest).filter(
+            kyc_request = await db.scalar(select(KYCRequest).where(
                 KYCRequest.artist_id == artist_uuid,
                 KYCRequest.status.in_(["pending", "in_progress", "document_verified", "face_verification_pending"])
-            ).order_by(KYCRequest.created_at.desc()).first()
+            ).order_by(KYCRequest.created_at.desc()).limit(1))
         except ValueError:
             pass
     
     # Method 4: Try matching by email if we have it in the payload
     if not kyc_request and payload.get("email"):
-        artist_by_email = db.query(Artist).filter(
+        artist_by_email = await db.scalar(select(Artist).where(
             Artist.email == payload.get("email")
-        ).first()
+        ))
         if artist_by_email:
-            kyc_request = db.query(KYCRequest).filter(
+            kyc_request = await db.scalar(select(KYCRequest).where(
                 KYCRequest.artist_id == artist_by_email.id,
                 KYCRequest.status.in_(["pending", "in_progress", "document_verified", "face_verification_pending"])
-            ).order_by(KYCRequest.created_at.desc()).first()
+            ).order_by(KYCRequest.created_at.desc()).limit(1))
     
     if not kyc_request:
         logger.warning(f"KYC request not found. kyc_id={kyc_id}, reference_id={reference_id}, email={payload.get('email')}")
         return {"success": False, "message": "KYC request not found", "acknowledged": True}
     
     # Find associated artist
-    artist = db.query(Artist).filter(Artist.id == kyc_request.artist_id).first()
+    artist = await db.scalar(select(Artist).where(Artist.id == kyc_request.artist_id))
     if not artist:
         logger.error(f"Artist not found for KYC request: {kyc_request.id}")
         return {"success": False, "message": "Artist not found", "acknowledged": True}
@@ -1229,7 +1194,9 @@ async def kyc_webhook(
         kyc_request.provider_kyc_id = kyc_id
         artist.kyc_id = kyc_id
     
-    db.commit()
+    await db.commit()
+    artist_principals.invalidate(artist.id)
+    artist_index.upsert(artist)
     
     logger.info(f"Webhook processed: artist={artist.id}, status={kyc_request.status}, verified={artist.kyc_verified}")
     
@@ -1244,8 +1211,8 @@ async def kyc_webhook(
 @router.get("/kyc/status/{artist_id}")
 async def get_kyc_status(
     artist_id: str,
-    current_artist: Artist = Depends(get_current_artist),
-    db: Session = Depends(get_db)
+    current_artist: ArtistPrincipal = Depends(get_current_artist),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current KYC verification status for an artist
@@ -1256,14 +1223,14 @@ async def get_kyc_status(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid artist ID format")
     
-    artist = db.query(Artist).filter(Artist.id == artist_uuid).first()
+    artist = await db.scalar(select(Artist).where(Artist.id == artist_uuid))
     if not artist:
         raise HTTPException(status_code=404, detail="Artist not found")
     
     # Get latest KYC request
-    kyc_request = db.query(KYCRequest).filter(
+    kyc_request = await db.scalar(select(KYCRequest).where(
         KYCRequest.artist_id == artist.id
-    ).order_by(KYCRequest.created_at.desc()).first()
+    ).order_by(KYCRequest.created_at.desc()).limit(1))
     
     response = {
         "artist_id": str(artist.id),
@@ -1292,8 +1259,9 @@ async def get_kyc_status(
 @router.post("/kyc/retry/{artist_id}")
 async def retry_kyc(
     artist_id: str,
-    current_artist: Artist = Depends(get_current_artist),
-    db: Session = Depends(get_db)
+    current_artist: ArtistPrincipal = Depends(get_current_artist),
+    db: AsyncSession = Depends(get_db),
+    meon: httpx.AsyncClient = Depends(upstream_client("meon")),
 ):
     """
     Retry KYC verification if previous attempt failed
@@ -1303,24 +1271,26 @@ async def retry_kyc(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid artist ID format")
     
-    artist = db.query(Artist).filter(Artist.id == artist_uuid).first()
+    artist = await db.scalar(select(Artist).where(Artist.id == artist_uuid))
     if not artist:
         raise HTTPException(status_code=404, detail="Artist not found")
     
     # Mark previous KYC requests as cancelled
-    db.query(KYCRequest).filter(
+    await db.execute(update(KYCRequest).where(
         KYCRequest.artist_id == artist.id,
         KYCRequest.status.in_(["pending", "in_progress", "failed"])
-    ).update({"status": "cancelled"})
+    ).values(status="cancelled"))
     
     # Reset artist KYC status (only KYC, not bank verification)
     artist.kyc_verified = False
     artist.kyc_id = None
     
-    db.commit()
+    await db.commit()
+    artist_principals.invalidate(artist.id)
+    artist_index.upsert(artist)  # no longer bookable until KYC passes again
     
     # Initiate new KYC (reuse start_kyc logic)
-    return await start_kyc(artist_id, current_artist, db)
+    return await start_kyc(artist_id, current_artist, db, meon=meon)
 
 
 
@@ -1330,7 +1300,7 @@ async def retry_kyc(
 async def complete_artist_profile(
     request: Request,
     payload: ArtistProfileCompleteRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Complete artist profile after initial signup
@@ -1364,6 +1334,9 @@ async def complete_artist_profile(
         if payload.certificate_url:
             artist.certificate_url = payload.certificate_url
         
+        # Tag arrays are stored as dictionary codes; register any new values first
+        await tag_dictionary.ensure(profession=payload.profession)
+
         # Update professional info
         if payload.how_did_you_learn:
             artist.how_did_you_learn = payload.how_did_you_learn
@@ -1395,13 +1368,14 @@ async def complete_artist_profile(
         if payload.mark_complete:
             artist.profile_completed = True
         
-        db.commit()
-        db.refresh(artist)
+        await db.commit()
+        await db.refresh(artist)
+        artist_principals.invalidate(artist.id)
         
         return artist
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"ERROR completing profile: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,145 @@
+# app/auth/routes/discovery.py
+"""
+Customer-facing artist discovery endpoints.
+"""
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.database import get_db
+from app.auth.schemas import ArtistFacetsResponse, ArtistSearchResponse, NearbyArtistsResponse
+from app.auth.utils.artist_index import artist_index
+from app.auth.utils.artist_search import (
+    MAX_FILTER_VALUES, MAX_QUERY_LENGTH, MAX_SEARCH_RESULTS, MIN_QUERY_LENGTH,
+    find_filtered_artists, normalize_query, search_artists,
+)
+from app.auth.utils.facets import facet_store
+from app.auth.utils.nearby import (
+    MAX_PAGE_SIZE, MAX_RADIUS_KM, InvalidCursor, find_nearby_artists, find_ranked_artists, find_serving_artists
+)
+from app.auth.utils.rate_limit import rate_limit
+
+router = APIRouter()
+
+
+@router.get("/artists/nearby", response_model=NearbyArtistsResponse)
+@rate_limit("60/minute")
+async def nearby_artists(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=MAX_RADIUS_KM),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    sort: Literal["distance", "relevance"] = "distance",
+    skills: List[str] = Query([]),
+    event_types: List[str] = Query([]),
+    booking_mode: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Bookable artists (active, KYC verified, profile completed) within
+    `radius_km` of (lat, lon).
+
+    sort=distance (default) returns nearest first. sort=relevance blends
+    distance, rating, overlap with the requested `skills` / `event_types`
+    and `booking_mode` (see utils/ranking.py).
+
+    Paginate by passing `next_cursor` from the previous page as `cursor`
+    (with the same sort).
+    """
+    preferences = {"skills": skills, "event_types": event_types, "booking_mode": booking_mode}
+    try:
+        if sort == "relevance":
+            if artist_index.ready:
+                page = artist_index.ranked(lat, lon, radius_km, limit, cursor, **preferences)
+            else:
+                page = await find_ranked_artists(db, lat, lon, radius_km, limit, cursor, **preferences)
+        elif artist_index.ready:
+            page = artist_index.nearby(lat, lon, radius_km=radius_km, limit=limit, cursor=cursor)
+        else:
+            # Index still loading (or failed to load): ask PostGIS directly
+            page = await find_nearby_artists(db, lat, lon, radius_km=radius_km, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": page.items, "next_cursor": page.next_cursor}
+
+
+@router.get("/artists/serving", response_model=NearbyArtistsResponse)
+@rate_limit("60/minute")
+async def serving_artists(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Bookable artists who travel to (lat, lon): the point lies inside their
+    own `travel_radius`, nearest first.
+
+    Paginate by passing `next_cursor` from the previous page as `cursor`.
+    """
+    try:
+        page = await find_serving_artists(db, lat, lon, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": page.items, "next_cursor": page.next_cursor}
+
+
+@router.get("/artists/filter", response_model=NearbyArtistsResponse)
+@rate_limit("60/minute")
+async def filter_artists(
+    request: Request,
+    skills: List[str] = Query([], max_length=MAX_FILTER_VALUES),
+    event_types: List[str] = Query([], max_length=MAX_FILTER_VALUES),
+    profession: List[str] = Query([], max_length=MAX_FILTER_VALUES),
+    travel_willingness: List[str] = Query([], max_length=MAX_FILTER_VALUES),
+    match: Literal["all", "any"] = "all",
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Bookable artists by tag, highest rated first.
+
+    Repeat a parameter for several values (?skills=Airbrush&skills=HD Makeup).
+    match=all requires every value of an attribute, match=any at least one;
+    different attributes are always combined with AND.
+    """
+    filters = {
+        "skills": skills,
+        "event_types": event_types,
+        "profession": profession,
+        "travel_willingness": travel_willingness,
+    }
+    try:
+        page = await find_filtered_artists(db, filters, match=match, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": page.items, "next_cursor": page.next_cursor}
+
+
+@router.get("/artists/search", response_model=ArtistSearchResponse)
+@rate_limit("120/minute")
+async def search_artists_by_name(
+    request: Request,
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH, max_length=MAX_QUERY_LENGTH),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    """
+    Bookable artists whose name, username or bio resembles `q`, best match
+    first. Tolerates typos and partial words ("priya sharam", "glamby").
+    """
+    query = normalize_query(q)
+    if len(query) < MIN_QUERY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Search needs at least {MIN_QUERY_LENGTH} characters")
+    return {"items": await search_artists(query, limit)}
+
+
+@router.get("/artists/facets", response_model=ArtistFacetsResponse)
+async def artist_facets(db: AsyncSession = Depends(get_db)):
+    """Number of bookable artists per tag value, for the filter sidebar (refreshed periodically)."""
+    return {"facets": await facet_store.get(db)}
@@ -1,40 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.params import Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-# Rate limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+from app.auth.utils.rate_limit import rate_limit
 
 from app.auth.firebase import verify_firebase_token
 from app.auth.schemas import EmailSignupRequest, OAuthRequest, OTPRequest, VerifyOTPRequest, UserResponse, CheckUserRequest, EmailLoginRequest, UserLocationUpdate
 from app.auth.models import User, EmailOTP, Artist
 from app.auth.database import get_db
-from app.auth.utils.otp import generate_otp, hash_otp, verify_otp, otp_expiry
-from app.auth.utils.send_email import send_otp_email
+from app.auth.utils.otp_store import otp_store, OTPVerificationError
+from app.auth.utils.send_email import send_new_otp
 import firebase_admin
 from firebase_admin import auth as firebase_auth
 from app.auth.utils.current_user import get_current_user
+from app.auth.utils.identity import resolve_identity
+from app.auth.utils.principal_cache import UserPrincipal, user_principals
 
 router = APIRouter()
 
 
 @router.get("/auth/customer/me")
-async def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def get_me(current_user: UserPrincipal = Depends(get_current_user)):
+    return current_user.as_dict()
 
 
 @router.put("/auth/customer/location", response_model=UserResponse)
 async def update_location(
     payload: UserLocationUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    principal: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update authenticated user's location and address
     """
+    current_user = await db.get(User, principal.id)
+    if not current_user:
+        raise HTTPException(status_code=404, detail="User not found. Please sign up first.")
+
     current_user.latitude = payload.latitude
     current_user.longitude = payload.longitude
     current_user.flat_building = payload.flat_building
@@ -52,8 +55,9 @@ async def update_location(
     # Point(longitude latitude)
     current_user.location = f"POINT({payload.longitude} {payload.latitude})"
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    user_principals.invalidate(current_user.id)
     
     return current_user
 
@@ -62,7 +66,7 @@ async def update_location(
 @router.post("/auth/customer/check")
 async def check_user_exists(
     payload: CheckUserRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Check if a user exists without creating or modifying anything.
@@ -71,9 +75,9 @@ async def check_user_exists(
     from app.auth.schemas import CheckUserResponse
     
     if payload.type == "email":
-        user = db.query(User).filter(User.email == payload.identifier).first()
+        user = await db.scalar(select(User).where(User.email == payload.identifier))
     elif payload.type == "phone":
-        user = db.query(User).filter(User.phone_number == payload.identifier).first()
+        user = await db.scalar(select(User).where(User.phone_number == payload.identifier))
     else:
         raise HTTPException(status_code=400, detail="Invalid type. Use 'email' or 'phone'")
     
@@ -84,12 +88,12 @@ async def check_user_exists(
 
 
 @router.post("/auth/customer/oauth", response_model=UserResponse)
-@limiter.limit("20/minute")  # Rate limit for OAuth login
+@rate_limit("20/minute")  # Rate limit for OAuth login
 async def oauth_login(
     request: Request,
     payload: OAuthRequest = OAuthRequest(),
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
   
     # Extract Bearer token
@@ -129,8 +133,9 @@ async def oauth_login(
             detail="Firebase UID not found in token"
         )
     
-    # Check if user exists by email
-    user = db.query(User).filter(User.email == email).first()
+    # Check if user exists by email - customer and artist tables in one round trip
+    resolution = await resolve_identity(db, email=email, tables=("customer", "artist"))
+    user = resolution.row("customer")
     
     if user:
         # Existing user - update if needed
@@ -150,12 +155,12 @@ async def oauth_login(
         #     updated = True
         
         if updated:
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
+            user_principals.invalidate(user.id)
     else:
         # NEW: Check if email exists as Artist (prevent cross-account duplicates)
-        existing_artist = db.query(Artist).filter(Artist.email == email).first()
-        if existing_artist:
+        if resolution.first("artist"):
             raise HTTPException(
                 status_code=400,
                 detail="This email is registered as an artist account. Please use the artist login."
@@ -171,8 +176,8 @@ async def oauth_login(
             longitude=payload.longitude
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     
     return user
 
@@ -182,11 +187,11 @@ async def oauth_login(
 
 
 @router.post("/auth/customer/login", response_model=UserResponse)
-@limiter.limit("20/minute")  # Rate limit for login attempts
+@rate_limit("20/minute")  # Rate limit for login attempts
 async def login(
     request: Request,
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -202,13 +207,14 @@ async def login(
     if not email:
         raise HTTPException(status_code=400, detail="Email required")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
 
     if user:
         if user.firebase_uid != firebase_uid:
             user.firebase_uid = firebase_uid
             user.provider = provider
-            db.commit()
+            await db.commit()
+            user_principals.invalidate(user.id)
     else:
         user = User(
             firebase_uid=firebase_uid,
@@ -217,8 +223,8 @@ async def login(
             provider=provider
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
     return user   # SQLAlchemy → Pydantic auto converts
 
@@ -230,50 +236,32 @@ async def login(
 
 
 @router.post("/auth/customer/email")
-@limiter.limit("5/minute")  # Strict limit to prevent OTP spam
+@rate_limit("5/minute")  # Strict limit to prevent OTP spam
 async def email_signup(
     request: Request,
     payload: EmailSignupRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
 
-    # Delete expired OTPs for this email
-    expired_otps = db.query(EmailOTP).filter(
-        EmailOTP.email == payload.email,
-        EmailOTP.expires_at < datetime.utcnow()
-    ).all()
-    
-    if expired_otps:
-        for expired_otp in expired_otps:
-            db.delete(expired_otp)
-        db.commit()
-        print(f"Deleted {len(expired_otps)} expired OTP(s) for {payload.email}")
-    # 1️⃣ Generate OTP
-    otp = generate_otp()
-
-    # 2️⃣ Store OTP + username
-    otp_entry = EmailOTP(
-        email=payload.email,
-        username=payload.username,
-        otp_hash=hash_otp(otp),
-        expires_at=otp_expiry()
-    )
+    # Impatient re-taps reuse the code that was just sent
+    resend_after = await otp_store.resend_after(db, "customer", payload.email, payload.username)
+    if resend_after:
+        return {"message": "OTP already sent", "email": payload.email, "resend_after": resend_after}
 
-    db.add(otp_entry)
-    db.commit()
+    # Queue the OTP email, then store OTP + username
+    await send_new_otp(db, "customer", payload.email, payload.username)
 
-    # 3️⃣ Send OTP email
-    send_otp_email(payload.email, otp)
+    return {"message": "OTP sent to your email", "email": payload.email}
 
 
 
 
 @router.post("/auth/customer/email/login")
-@limiter.limit("5/minute")
+@rate_limit("5/minute")
 async def email_login(
     request: Request,
     payload: EmailLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     LOGIN: Send OTP to email (email only, no username needed)
@@ -282,80 +270,38 @@ async def email_login(
     Response: {"message": "OTP sent to your email", "email": "user@example.com"}
     """
     # Check if user exists
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await db.scalar(select(User).where(User.email == payload.email))
     if not user:
         raise HTTPException(status_code=404, detail="Email not registered. Please signup first.")
-        # Delete expired OTPs for this email
-    expired_otps = db.query(EmailOTP).filter(
-        EmailOTP.email == payload.email,
-        EmailOTP.expires_at < datetime.utcnow()
-    ).all()
-    
-    if expired_otps:
-        for expired_otp in expired_otps:
-            db.delete(expired_otp)
-        db.commit()
-        print(f"Deleted {len(expired_otps)} expired OTP(s) for {payload.email}")
-    # 1️⃣ Generate OTP
-    otp = generate_otp()
-    # Generate OTP
-    otp = generate_otp()
-    
-    # Store OTP with existing username
-    otp_entry = EmailOTP(
-        email=payload.email,
-        username=user.name,
-        otp_hash=hash_otp(otp),
-        expires_at=otp_expiry()
-    )
-    db.add(otp_entry)
-    db.commit()
-    
-    # Send OTP email
-    print(f"DEBUG OTP: {otp}")
-    send_otp_email(payload.email, otp)
+
+    # Impatient re-taps reuse the code that was just sent
+    resend_after = await otp_store.resend_after(db, "customer", payload.email, user.name)
+    if resend_after:
+        return {"message": "OTP already sent", "email": payload.email, "resend_after": resend_after}
+
+    # Queue the OTP email, then store it with the existing username
+    await send_new_otp(db, "customer", payload.email, user.name)
     
     return {"message": "OTP sent to your email", "email": payload.email}
 
 
 @router.post("/auth/customer/email/verify", response_model=UserResponse)
-@limiter.limit("10/minute")  # Prevent brute-force OTP guessing
+@rate_limit("10/minute")  # Prevent brute-force OTP guessing
 async def verify_email_otp(
     request: Request,
     payload: VerifyOTPRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # 1️⃣ Get the latest OTP record for this email
-    otp_record = (
-        db.query(EmailOTP)
-        .filter(EmailOTP.email == payload.email)
-        .order_by(EmailOTP.id.desc())
-        .first()
-    )
-
-    if not otp_record:
-        print(f"DEBUG: OTP not found for email {payload.email}")
-        raise HTTPException(status_code=400, detail="OTP not found")
-
-    # 2️⃣ Check expiry
-    if otp_record.expires_at < datetime.utcnow():
-        print(f"DEBUG: OTP expired for {payload.email}. Expires: {otp_record.expires_at}, Now: {datetime.utcnow()}")
-        raise HTTPException(status_code=400, detail="OTP expired")
-
-    # 3️⃣ Verify OTP
-    if not verify_otp(payload.otp, otp_record.otp_hash):
-        print(f"DEBUG: Invalid OTP for {payload.email}. Provided: {payload.otp}")
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-
-    # 4️⃣ Get the username from OTP record
-    username = otp_record.username
-
-    # 5️⃣ Delete the used OTP
-    db.delete(otp_record)
-    db.commit()
+    # 1️⃣-5️⃣ Check expiry, verify and consume the latest OTP for this email;
+    # the username comes from the OTP record
+    try:
+        username = await otp_store.consume(db, "customer", payload.email, payload.otp)
+    except OTPVerificationError as e:
+        print(f"DEBUG: OTP verification failed for {payload.email}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
 
     # 6️⃣ Check if user already exists
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await db.scalar(select(User).where(User.email == payload.email))
 
     if not user:
         # 7️⃣ Create user in Firebase
@@ -377,8 +323,8 @@ async def verify_email_otp(
             address=""
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
     # 9️⃣ Generate Firebase Custom Token
     try:
@@ -397,12 +343,12 @@ async def verify_email_otp(
 
 
 @router.post("/auth/customer/otp", response_model=UserResponse)
-@limiter.limit("10/minute")  # Rate limit for OTP authentication
+@rate_limit("10/minute")  # Rate limit for OTP authentication
 async def otp_auth(
     request: Request,
     payload: OTPRequest,
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Authenticate user with Firebase OTP
@@ -448,7 +394,7 @@ async def otp_auth(
         raise HTTPException(status_code=400, detail="Firebase UID not found in token")
     
     # Check if user exists
-    user = db.query(User).filter(User.phone_number == phone_number).first()
+    user = await db.scalar(select(User).where(User.phone_number == phone_number))
     
     if user:
         # Existing user - update if needed
@@ -468,8 +414,9 @@ async def otp_auth(
             updated = True
         
         if updated:
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
+            user_principals.invalidate(user.id)
     else:
         # New user - create
         user = User(
@@ -481,8 +428,8 @@ async def otp_auth(
             longitude=payload.longitude
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     
     return user
 
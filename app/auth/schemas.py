@@ -239,4 +239,35 @@ class ArtistResponse(BaseModel):
     bank_verified: bool | None = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ArtistCard(BaseModel):
+    """Compact artist projection for search / discovery results"""
+    id: UUID
+    name: str | None = None
+    username: str | None = None
+    profile_pic_url: str | None = None
+    profession: List[str] = []
+    city: str | None = None
+    rating: float | None = None
+    total_reviews: int | None = None
+    booking_mode: str | None = None
+    distance_km: float | None = None
+
+
+class NearbyArtistsResponse(BaseModel):
+    items: List[ArtistCard]
+    next_cursor: str | None = None  # pass back as ?cursor= for the next page
+
+
+class ArtistSearchResponse(BaseModel):
+    items: List[ArtistCard]  # best match first
+
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+
+class ArtistFacetsResponse(BaseModel):
+    facets: dict[str, List[FacetValue]]  # attribute -> values, most common first
@@ -0,0 +1,275 @@
+# utils/artist_index.py
+"""
+In-process spatial index of bookable artists.
+
+Holds a card snapshot of every bookable artist (active, KYC verified,
+profile completed, with coordinates) bucketed into a lat/lon grid, so
+/artists/nearby is answered from memory instead of Postgres when thousands
+of customers open the home screen at once.
+
+Freshness:
+- loaded from the artists table at startup
+- updated in place by the routes that change an artist in this process
+  (update_artist_location, complete_artist_profile, kyc_webhook, retry_kyc)
+- a background sync every ARTIST_INDEX_SYNC_INTERVAL seconds applies rows
+  changed by other workers (updated_at watermark) and compares the bookable
+  count with the database; on mismatch the index is rebuilt
+
+Until the first load finishes (or if it fails) `ready` is False and callers
+fall back to the PostGIS query in utils/nearby.py. Pages and cursors are
+interchangeable with that query.
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.auth.database import AsyncSessionLocal
+from app.auth.models import Artist
+from app.auth.utils.nearby import (
+    BOOKABLE, CARD_COLUMNS, MAX_PAGE_SIZE, MAX_RADIUS_KM, RANKING_COLUMNS, NearbyPage,
+    card_from_row, decode_cursor, encode_cursor, ranked_page,
+)
+from app.auth.utils.ranking import CandidateColumns
+from app.auth.utils.tag_dictionary import tag_dictionary
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8  # mean radius, as used by PostGIS' spherical <->
+_KM_PER_DEG_LAT = 111.32
+
+_CARD_FIELDS = tuple(col.key for col in (*CARD_COLUMNS, *RANKING_COLUMNS))
+
+
+class ArtistCardRow(NamedTuple("_ArtistCardRow", [(name, object) for name in _CARD_FIELDS])):
+    """Snapshot of the card and ranking columns for one artist."""
+
+    @classmethod
+    def from_row(cls, row) -> "ArtistCardRow":
+        return cls(*(getattr(row, name) for name in _CARD_FIELDS))
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def is_bookable(artist) -> bool:
+    return bool(
+        artist.is_active and artist.kyc_verified and artist.profile_completed
+        and artist.latitude is not None and artist.longitude is not None
+    )
+
+
+class ArtistIndex:
+    """Grid-bucketed card snapshots with the same paging contract as find_nearby_artists."""
+
+    def __init__(self, cell_deg: float = 0.1, sync_interval: float = 30.0):
+        self.cell_deg = cell_deg  # ~11km cells
+        self.sync_interval = sync_interval
+        self.ready = False
+        self._cards: dict = {}   # artist id -> ArtistCardRow
+        self._cells: dict = {}   # (row, col) -> set of artist ids
+        self._watermark = None   # max(updated_at) seen
+        self._columns = None     # (CandidateColumns, rows, cell -> row positions) for ranking; rebuilt after a card changes
+        self._task: asyncio.Task | None = None
+        self.last_sync = 0.0
+        self.rebuilds = 0
+
+    # ---- maintenance ----
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _discard(self, artist_id) -> None:
+        card = self._cards.pop(artist_id, None)
+        if card is not None:
+            self._columns = None
+            cell = self._cells.get(self._cell(card.latitude, card.longitude))
+            if cell is not None:
+                cell.discard(artist_id)
+                if not cell:
+                    del self._cells[self._cell(card.latitude, card.longitude)]
+
+    def upsert(self, artist) -> None:
+        """Apply the committed state of `artist` (ORM instance or row with the bookable columns)."""
+        if not is_bookable(artist):
+            self._discard(artist.id)
+            return
+        card = ArtistCardRow.from_row(artist)
+        if self._cards.get(artist.id) == card:
+            # Unchanged (e.g. the watermark row every sync re-reads): keep the ranking columns
+            return
+        self._discard(artist.id)
+        self._columns = None
+        self._cards[artist.id] = card
+        self._cells.setdefault(self._cell(card.latitude, card.longitude), set()).add(artist.id)
+
+    def remove(self, artist_id) -> None:
+        self._discard(artist_id)
+
+    def _rebuild(self, rows) -> None:
+        self._cards = {}
+        self._cells = {}
+        self._columns = None
+        for row in rows:
+            self.upsert(row)
+
+    # ---- queries ----
+
+    def _covering_cells(self, lat: float, lon: float, radius_km: float):
+        """Grid cells covering the bounding box of the radius around (lat, lon)."""
+        dlat = radius_km / _KM_PER_DEG_LAT
+        dlon = radius_km / (_KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        row_lo, col_lo = self._cell(lat - dlat, lon - dlon)
+        row_hi, col_hi = self._cell(lat + dlat, lon + dlon)
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                yield row, col
+
+    def _ranking_columns(self):
+        if self._columns is None:
+            rows = list(self._cards.values())
+            positions: dict = {}
+            for i, card in enumerate(rows):
+                positions.setdefault(self._cell(card.latitude, card.longitude), []).append(i)
+            by_cell = {cell: np.array(idx, dtype=np.intp) for cell, idx in positions.items()}
+            self._columns = (CandidateColumns(rows), rows, by_cell)
+        return self._columns
+
+    def nearby(
+        self, lat: float, lon: float, radius_km: float = 10, limit: int = 20, cursor: str | None = None
+    ) -> NearbyPage:
+        """Same contract as utils.nearby.find_nearby_artists, answered from memory."""
+        radius_km = min(radius_km, MAX_RADIUS_KM)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        radius_m = radius_km * 1000
+        after = decode_cursor(cursor) if cursor else None
+
+        candidates = []
+        for cell in self._covering_cells(lat, lon, radius_km):
+            for artist_id in self._cells.get(cell, ()):
+                card = self._cards[artist_id]
+                distance = haversine_m(lat, lon, card.latitude, card.longitude)
+                if distance > radius_m:
+                    continue
+                if after is not None and (distance, artist_id) <= after:
+                    continue
+                candidates.append((distance, artist_id))
+
+        page = heapq.nsmallest(limit + 1, candidates)
+        has_more = len(page) > limit
+        page = page[:limit]
+        items = [card_from_row(self._cards[artist_id], distance) for distance, artist_id in page]
+        next_cursor = encode_cursor(*page[-1]) if has_more else None
+        return NearbyPage(items, next_cursor)
+
+    def ranked(
+        self, lat: float, lon: float, radius_km: float = 10, limit: int = 20, cursor: str | None = None,
+        **preferences,
+    ) -> NearbyPage:
+        """Same contract as utils.nearby.find_ranked_artists, scored over columnar snapshots."""
+        radius_km = min(radius_km, MAX_RADIUS_KM)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cols, rows, by_cell = self._ranking_columns()
+        # Only artists in the cells around the radius are scored, as in nearby()
+        parts = [by_cell[cell] for cell in self._covering_cells(lat, lon, radius_km) if cell in by_cell]
+        idx = np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+        return ranked_page(
+            cols.take(idx), [rows[i] for i in idx], lat, lon, radius_km, limit, cursor, **preferences
+        )
+
+    # ---- loading / sync ----
+
+    _SYNC_COLUMNS = (*CARD_COLUMNS, *RANKING_COLUMNS, Artist.is_active, Artist.kyc_verified, Artist.profile_completed, Artist.updated_at)
+    # Same rule as is_bookable()
+    _INDEXED = (*BOOKABLE, Artist.latitude.isnot(None), Artist.longitude.isnot(None))
+
+    async def load(self) -> None:
+        """Full (re)build from the artists table."""
+        # Tags registered by other workers must be known before their codes are decoded
+        await tag_dictionary.load()
+        async with AsyncSessionLocal() as db:
+            # Watermark first: anything written while the rows load is re-applied by the next sync
+            watermark = await db.scalar(select(func.max(Artist.updated_at)))
+            rows = (await db.execute(select(*self._SYNC_COLUMNS).where(*self._INDEXED))).all()
+        self._rebuild(rows)
+        self._watermark = watermark
+        self.ready = True
+        self.last_sync = time.time()
+        logger.info(f"Artist index loaded: {len(self._cards)} bookable artists")
+
+    async def sync(self) -> None:
+        """Apply rows changed since the last sync, then check the bookable count."""
+        if not self.ready:
+            await self.load()
+            return
+        await tag_dictionary.load()
+        async with AsyncSessionLocal() as db:
+            stmt = select(*self._SYNC_COLUMNS)
+            if self._watermark is not None:
+                # >= so rows sharing the watermark timestamp aren't missed; upsert is idempotent
+                stmt = stmt.where(Artist.updated_at >= self._watermark)
+            changed = (await db.execute(stmt)).all()
+            expected = await db.scalar(select(func.count()).select_from(Artist).where(*self._INDEXED))
+
+        for row in changed:
+            self.upsert(row)
+            if self._watermark is None or row.updated_at > self._watermark:
+                self._watermark = row.updated_at
+        self.last_sync = time.time()
+
+        # Catches anything the watermark can't see (deletes, writes without updated_at)
+        if expected != len(self._cards):
+            logger.warning(f"Artist index drifted ({len(self._cards)} cached vs {expected} in DB); rebuilding")
+            self.rebuilds += 1
+            await self.load()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Artist index sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def start(self) -> None:
+        """Start the load + periodic sync task (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "artists": len(self._cards),
+            "cells": len(self._cells),
+            "last_sync": self.last_sync,
+            "rebuilds": self.rebuilds,
+        }
+
+
+artist_index = ArtistIndex(
+    cell_deg=float(os.getenv("ARTIST_INDEX_CELL_DEG", "0.1")),
+    sync_interval=float(os.getenv("ARTIST_INDEX_SYNC_INTERVAL", "30")),
+)
@@ -0,0 +1,157 @@
+# utils/artist_search.py
+"""
+Attribute filters over the artists' tag arrays, and typo-tolerant search by
+name / username / bio.
+
+skills, event_types, profession and travel_willingness are SMALLINT[]
+arrays of artist_tags codes (utils/tag_dictionary.py) with partial GIN
+indexes over bookable artists (alembic c9d0e1f2a3b4), so filters encode the
+requested values and use the array operators those indexes serve:
+
+    match="all"   column @> ARRAY[codes]   every requested value present
+    match="any"   column && ARRAY[codes]   at least one requested value present
+
+Codes come from the in-process dictionary; a value it doesn't know (e.g.
+registered by another worker since the last reload) is resolved against
+artist_tags inside the same statement instead.
+
+Results are ordered by rating (best first) and paged with a keyset cursor.
+
+search_artists matches the query against name, username and bio with
+pg_trgm word similarity (`column %> query`, served by the partial trigram
+GIN indexes from alembic e1f2a3b4c5d6) and returns the best matches; bio
+counts for half. Typeahead sends the same few prefixes over and over, so
+results are cached for SEARCH_CACHE_TTL seconds with single-flight fills
+(utils/ttl_cache.py). Failed searches are not papered over with expired
+results unless SEARCH_CACHE_STALE_TTL is set.
+
+Usage:
+    from app.auth.utils.artist_search import find_filtered_artists, search_artists
+
+    page = await find_filtered_artists(db, {"skills": ["Airbrush"], "event_types": ["Wedding"]})
+    cards = await search_artists(normalize_query("priya sharma"), limit=10)
+"""
+
+import os
+
+from sqlalchemy import Float, SmallInteger, and_, func, literal, or_, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.database import AsyncSessionLocal
+from app.auth.models import Artist, ArtistTag
+from app.auth.utils.nearby import (
+    BOOKABLE, CARD_COLUMNS, MAX_PAGE_SIZE, NearbyPage, card_from_row, decode_cursor, encode_cursor
+)
+from app.auth.utils.tag_dictionary import tag_dictionary
+from app.auth.utils.ttl_cache import TTLCache
+
+# Filterable attribute -> column (each has a GIN index)
+TAG_ATTRIBUTES = {
+    "skills": Artist.skills,
+    "event_types": Artist.event_types,
+    "profession": Artist.profession,
+    "travel_willingness": Artist.travel_willingness,
+}
+
+MAX_FILTER_VALUES = 20
+
+MIN_QUERY_LENGTH = 3  # shorter strings have no trigram to match on
+MAX_QUERY_LENGTH = 64
+MAX_SEARCH_RESULTS = 20
+MIN_WORD_SIMILARITY = 0.4  # pg_trgm's default (0.6) rejects most single-typo names
+BIO_WEIGHT = 0.5
+
+# Keyed by (normalized query, limit); entries are short-lived so profile edits show up quickly
+search_cache = TTLCache(
+    "Search",
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "30")),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE_TTL", "0")),
+)
+
+
+def tag_filter(attribute: str, values: list[str], match: str = "all"):
+    """`column @> codes` (match="all") or `column && codes` (match="any") for `attribute`."""
+    column = TAG_ATTRIBUTES[attribute]
+    operator = "@>" if match == "all" else "&&"
+    codes = tag_dictionary.lookup(attribute, values)
+    if None not in codes:
+        return column.op(operator)(literal(codes, ARRAY(SmallInteger)))
+
+    # Not in this process's dictionary yet: look the codes up in the query
+    wanted = set(values)
+    resolved = select(ArtistTag.id).where(ArtistTag.attribute == attribute, ArtistTag.value.in_(wanted))
+    array = func.array(resolved.scalar_subquery(), type_=ARRAY(SmallInteger))
+    condition = column.op(operator)(array)
+    if match == "all":
+        # A value with no code at all can't be present
+        condition = and_(func.cardinality(array) == len(wanted), condition)
+    return condition
+
+
+async def find_filtered_artists(
+    db: AsyncSession,
+    filters: dict[str, list[str]],
+    match: str = "all",
+    limit: int = 20,
+    cursor: str | None = None,
+) -> NearbyPage:
+    """One page of bookable artists matching `filters`, highest rated first."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rating = func.coalesce(Artist.rating, 0.0)
+
+    stmt = select(*CARD_COLUMNS, rating.label("sort_rating")).where(*BOOKABLE)
+    for attribute, values in filters.items():
+        if values:
+            stmt = stmt.where(tag_filter(attribute, values[:MAX_FILTER_VALUES], match))
+    if cursor:
+        last_rating, last_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(rating < last_rating, and_(rating == last_rating, Artist.id > last_id)))
+    stmt = stmt.order_by(rating.desc(), Artist.id).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [card_from_row(row) for row in rows]
+    next_cursor = encode_cursor(rows[-1].sort_rating, rows[-1].id) if has_more else None
+    return NearbyPage(items, next_cursor)
+
+
+def normalize_query(q: str) -> str:
+    """Lowercased, whitespace-collapsed and truncated, so equivalent queries share a cache entry."""
+    return " ".join(q.lower().split())[:MAX_QUERY_LENGTH]
+
+
+async def search_artists(query: str, limit: int = 10) -> list[dict]:
+    """Cards of the bookable artists best matching `query` (already normalized), best first."""
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    # The fill runs in its own session: it is shared by every request waiting on this key
+    return await search_cache.get_or_fetch((query, limit), lambda: _search(query, limit))
+
+
+async def _search(query: str, limit: int) -> list[dict]:
+    score = func.greatest(
+        func.word_similarity(query, Artist.name, type_=Float),
+        func.word_similarity(query, Artist.username, type_=Float),
+        BIO_WEIGHT * func.word_similarity(query, Artist.bio, type_=Float),
+    )
+    stmt = (
+        select(*CARD_COLUMNS, score.label("score"))
+        .where(
+            *BOOKABLE,
+            # %> (word_similarity(query, column) > threshold) is what the trigram indexes serve
+            or_(Artist.name.op("%>")(query), Artist.username.op("%>")(query), Artist.bio.op("%>")(query)),
+        )
+        .order_by(score.desc(), Artist.id)
+        .limit(limit)
+    )
+    async with AsyncSessionLocal() as db:
+        # Transaction-local, so pooled connections keep the server default
+        await db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {"threshold": str(MIN_WORD_SIMILARITY)},
+        )
+        rows = (await db.execute(stmt)).all()
+    return [card_from_row(row) for row in rows]
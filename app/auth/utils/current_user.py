@@ -5,30 +5,40 @@ Usage in routes:
     from app.auth.utils.current_user import get_current_user
     
     @router.get("/me")
-    async def get_me(current_user: User = Depends(get_current_user)):
-        return current_user
+    async def get_me(current_user: UserPrincipal = Depends(get_current_user)):
+        return current_user.as_dict()
+
+Both dependencies return a read-only principal snapshot served from a
+short-lived cross-request cache. Routes that modify the row must load it
+with `await db.get(Model, principal.id)` and call
+`user_principals.invalidate(...)` / `artist_principals.invalidate(...)`
+after committing.
 """
 
 from fastapi import Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.firebase import verify_token
 from app.auth.database import get_db
-from app.auth.models import User
+from app.auth.utils.identity import resolve_identity
+from app.auth.utils.principal_cache import (
+    ArtistPrincipal, UserPrincipal, artist_principals, user_principals
+)
 
 
 async def get_current_user(
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> UserPrincipal:
     """
     FastAPI Dependency to get the current authenticated user.
     
     Process:
     1. Extract Bearer token from Authorization header
     2. Verify token with Firebase
-    3. Search for user in database by firebase_uid
-    4. Return user data to frontend
+    3. Return the cached principal for this firebase_uid, if any
+    4. Otherwise search for user in database by firebase_uid and cache it
+    5. Return user data to frontend
     
     Raises:
         HTTPException 401: Invalid/missing token
@@ -62,15 +72,20 @@ async def get_current_user(
             detail="Invalid token: Firebase UID not found"
         )
     
-    # Search for user in database
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
-    
-    # Also try email/phone if provided in token (for robustness)
-    if not user and (decoded.get("email") or decoded.get("phone_number")):
-        if decoded.get("email"):
-            user = db.query(User).filter(User.email == decoded.get("email")).first()
-        if not user and decoded.get("phone_number"):
-            user = db.query(User).filter(User.phone_number == decoded.get("phone_number")).first()
+    principal = user_principals.get(firebase_uid)
+    if principal is not None:
+        return principal
+    
+    # Search for user in database by firebase_uid, falling back to email/phone
+    # from the token (for robustness) - all in one round trip
+    resolution = await resolve_identity(
+        db,
+        firebase_uid=firebase_uid,
+        email=decoded.get("email"),
+        phone_number=decoded.get("phone_number"),
+        tables=("customer",),
+    )
+    user = resolution.row("customer")
     
     if not user:
         raise HTTPException(
@@ -78,19 +93,19 @@ async def get_current_user(
             detail="User not found. Please sign up first."
         )
     
-    return user
+    principal = UserPrincipal.from_row(user)
+    user_principals.put(firebase_uid, principal)
+    return principal
 
 
 async def get_current_artist(
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_db)
+) -> ArtistPrincipal:
     """
     FastAPI Dependency to get the current authenticated artist.
     Similar to get_current_user but searches in the Artist table.
     """
-    from app.auth.models import Artist
-    
     # Extract Bearer token
     if not authorization.startswith("Bearer "):
         raise HTTPException(
@@ -121,14 +136,20 @@ async def get_current_artist(
             detail="Invalid token: Firebase UID not found"
         )
     
-    # Search for artist by firebase_uid first (most reliable)
-    artist = db.query(Artist).filter(Artist.firebase_uid == firebase_uid).first()
-    
-    # Fallback to email or phone if firebase_uid lookup failed
-    if not artist and email:
-        artist = db.query(Artist).filter(Artist.email == email).first()
-    if not artist and phone:
-        artist = db.query(Artist).filter(Artist.phone_number == phone).first()
+    principal = artist_principals.get(firebase_uid)
+    if principal is not None:
+        return principal
+    
+    # Search for artist by firebase_uid first (most reliable), with email or
+    # phone as fallbacks - resolved in a single round trip
+    resolution = await resolve_identity(
+        db,
+        firebase_uid=firebase_uid,
+        email=email,
+        phone_number=phone,
+        tables=("artist",),
+    )
+    artist = resolution.row("artist")
     
     if not artist:
         raise HTTPException(
@@ -136,4 +157,6 @@ async def get_current_artist(
             detail="Artist not found. Please register as an artist first."
         )
     
-    return artist
+    principal = ArtistPrincipal.from_row(artist)
+    artist_principals.put(firebase_uid, principal)
+    return principal
@@ -0,0 +1,208 @@
+# utils/email_queue.py
+"""
+Asynchronous email dispatch.
+
+Messages are put on a bounded in-process queue and delivered by a small pool
+of worker tasks, so request handlers return as soon as a message is queued.
+Delivery goes through a pluggable transport:
+
+    SendGridTransport  - SendGrid v3 HTTP API over the shared "sendgrid" client
+    FileSinkTransport  - appends each message as a JSON line to a file
+                         (local development / tests; nothing leaves the box)
+
+Select with EMAIL_TRANSPORT=sendgrid|file (EMAIL_SINK_PATH for the file sink).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import NamedTuple
+
+from app.auth.utils.http_clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+
+class EmailMessage(NamedTuple):
+    to: str
+    subject: str
+    html: str
+    enqueued_at: float  # time.monotonic() when queued
+
+
+class EmailQueueFull(RuntimeError):
+    """Raised when the dispatch queue is at capacity."""
+
+
+class PermanentEmailError(Exception):
+    """Delivery failed in a way retrying won't fix (bad request, bad config)."""
+
+
+class SendGridTransport:
+    """Sends through SendGrid's v3 mail/send endpoint."""
+
+    API_URL = "https://api.sendgrid.com/v3/mail/send"
+
+    def __init__(self, api_key: str | None, from_email: str | None):
+        self.api_key = api_key
+        self.from_email = from_email
+
+    async def send(self, message: EmailMessage) -> None:
+        if not self.api_key or not self.from_email:
+            raise PermanentEmailError("SendGrid API key or FROM_EMAIL is not loaded from .env")
+
+        resp = await http_clients.get("sendgrid").post(
+            self.API_URL,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "personalizations": [{"to": [{"email": message.to}]}],
+                "from": {"email": self.from_email},
+                "subject": message.subject,
+                "content": [{"type": "text/html", "value": message.html}],
+            },
+        )
+        if resp.status_code == 429 or resp.status_code >= 500:
+            resp.raise_for_status()  # retryable
+        if resp.status_code >= 400:
+            raise PermanentEmailError(f"SendGrid rejected message ({resp.status_code}): {resp.text[:200]}")
+
+    async def close(self) -> None:
+        pass  # the shared client is closed with http_clients on shutdown
+
+
+class FileSinkTransport:
+    """Appends messages to a JSON-lines file instead of sending them."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send(self, message: EmailMessage) -> None:
+        line = json.dumps({"to": message.to, "subject": message.subject, "html": message.html})
+        # Tiny local append; run off the loop anyway so a slow disk can't stall it
+        await asyncio.to_thread(self._append, line)
+
+    def _append(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def close(self) -> None:
+        pass
+
+
+class EmailDispatcher:
+    """Bounded queue + worker tasks with retry/backoff and delivery metrics."""
+
+    def __init__(
+        self,
+        transport,
+        maxsize: int = 1000,
+        workers: int = 4,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self.transport = transport
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list = []
+
+        # Metrics
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _ensure_started(self) -> None:
+        # Lazily started so the queue binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    def enqueue(self, to: str, subject: str, html: str) -> None:
+        """Queue a message for delivery; raises EmailQueueFull when at capacity."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(EmailMessage(to, subject, html, time.monotonic()))
+        except asyncio.QueueFull:
+            raise EmailQueueFull("Email queue is full, please try again shortly")
+        self.enqueued += 1
+
+    async def _deliver(self, message: EmailMessage) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.transport.send(message)
+                latency = time.monotonic() - message.enqueued_at
+                self.delivered += 1
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                return
+            except PermanentEmailError as e:
+                logger.error(f"Email to {message.to} failed permanently: {e}")
+                break
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.error(f"Email to {message.to} failed after {attempt} attempts: {e}")
+                    break
+                self.retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)  # jitter
+                logger.warning(f"Email to {message.to} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+        self.failed += 1
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            except Exception:
+                logger.exception("Unexpected error in email worker")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Give queued messages a chance to go out, then stop the workers."""
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Email queue not drained on shutdown ({self._queue.qsize()} left)")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.transport.close()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "avg_latency_ms": (self._latency_total / self.delivered * 1000) if self.delivered else 0.0,
+            "max_latency_ms": self._latency_max * 1000,
+        }
+
+
+def build_transport(name: str | None = None):
+    name = (name or os.getenv("EMAIL_TRANSPORT", "sendgrid")).lower()
+    if name == "sendgrid":
+        return SendGridTransport(os.getenv("SENDGRID_API_KEY"), os.getenv("FROM_EMAIL"))
+    if name == "file":
+        return FileSinkTransport(os.getenv("EMAIL_SINK_PATH", "sent_emails.jsonl"))
+    raise ValueError(f"Unknown EMAIL_TRANSPORT: {name}")
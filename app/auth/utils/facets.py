@@ -0,0 +1,113 @@
+# utils/facets.py
+"""
+Facet counts for the artist filter sidebar.
+
+Counts per (attribute, value) over bookable artists live in the
+materialized view artist_tag_facets (alembic c9d0e1f2a3b4, d0e1f2a3b4c5). A background
+task refreshes it every FACET_REFRESH_INTERVAL seconds with
+REFRESH ... CONCURRENTLY, so reads never block; an advisory lock makes
+sure only one worker refreshes at a time. Reads are served from an
+in-process copy for FACET_CACHE_TTL seconds, so the sidebar costs no
+query at all most of the time.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.database import AsyncSessionLocal
+from app.auth.models import Artist
+
+logger = logging.getLogger(__name__)
+
+FACET_VIEW = "artist_tag_facets"
+_REFRESH_LOCK_KEY = 0x6D696D66  # arbitrary, shared by all workers
+
+# Same SQL as the migration; used for databases created through create_all.
+# Tag columns hold artist_tags codes (utils/tag_dictionary.py); codes are unique
+# across attributes, so one join decodes all four arrays.
+FACET_VIEW_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {FACET_VIEW} AS
+SELECT tags.attribute, tags.value, count(DISTINCT artists.id)::int AS artists
+FROM artists
+CROSS JOIN LATERAL unnest(
+    artists.skills || artists.event_types || artists.profession || artists.travel_willingness
+) AS code
+JOIN artist_tags AS tags ON tags.id = code
+WHERE artists.is_active AND artists.kyc_verified AND artists.profile_completed
+GROUP BY tags.attribute, tags.value
+"""
+FACET_INDEX_SQL = f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{FACET_VIEW} ON {FACET_VIEW} (attribute, value)"
+
+# On the metadata rather than the artists table: the view needs artist_tags too
+event.listen(Artist.metadata, "after_create", DDL(FACET_VIEW_SQL))
+event.listen(Artist.metadata, "after_create", DDL(FACET_INDEX_SQL))
+
+class FacetStore:
+    """Cached reads of, and periodic refreshes for, the facet view."""
+
+    def __init__(self, refresh_interval: float = 300.0, cache_ttl: float = 60.0):
+        self.refresh_interval = refresh_interval
+        self.cache_ttl = cache_ttl
+        self._cached: dict | None = None
+        self._cached_at = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def get(self, db: AsyncSession) -> dict:
+        """{attribute: [{"value", "count"}, ...]} with the most common values first."""
+        if self._cached is not None and time.monotonic() - self._cached_at < self.cache_ttl:
+            return self._cached
+        rows = (await db.execute(text(
+            f"SELECT attribute, value, artists FROM {FACET_VIEW} ORDER BY attribute, artists DESC, value"
+        ))).all()
+        facets: dict = {}
+        for attribute, value, count in rows:
+            facets.setdefault(attribute, []).append({"value": value, "count": count})
+        self._cached = facets
+        self._cached_at = time.monotonic()
+        return facets
+
+    async def refresh(self) -> bool:
+        """Refresh the view unless another worker is already doing it. Returns True if refreshed."""
+        async with AsyncSessionLocal() as db:
+            got_lock = await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _REFRESH_LOCK_KEY})
+            if not got_lock:
+                return False
+            await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {FACET_VIEW}"))
+            await db.commit()
+        self._cached = None
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Facet refresh failed: {e}")
+
+    async def start(self) -> None:
+        """Start the periodic refresher (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+facet_store = FacetStore(
+    refresh_interval=float(os.getenv("FACET_REFRESH_INTERVAL", "300")),
+    cache_ttl=float(os.getenv("FACET_CACHE_TTL", "60")),
+)
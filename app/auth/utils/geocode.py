@@ -0,0 +1,180 @@
+# utils/geocode.py
+"""
+Reverse geocoding behind a geohash-quantized cache.
+
+Address pickers mostly ask about the same few neighbourhoods, and Nominatim
+allows ~1 request/second, so lookups are snapped to a geohash cell
+(GEOCODE_GEOHASH_PRECISION, default 7 = ~150m) and cached per
+(cell, language):
+
+- LRU + TTL eviction (GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL), utils/ttl_cache.py
+- concurrent misses for the same cell share one upstream call (single-flight)
+- if upstream fails, an expired entry younger than GEOCODE_CACHE_STALE_TTL
+  is served instead of an error (stale-if-error)
+
+The upstream is queried at the cell centre, so every point in a cell gets the
+same answer regardless of who asked first. When an offline dataset is
+configured (utils/offline_geocoder.py) it answers first and Nominatim is only
+the fallback. Calls that do reach Nominatim are paced by nominatim_scheduler
+(utils/upstream_scheduler.py).
+"""
+
+import os
+
+import httpx
+
+from app.auth.utils.http_clients import http_clients
+from app.auth.utils.offline_geocoder import offline_geocoder
+from app.auth.utils.ttl_cache import TTLCache
+from app.auth.utils.upstream_scheduler import INTERACTIVE, UpstreamScheduler
+
+NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
+GEOCODE_LANGUAGE = "en"
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 7) -> str:
+    """Standard base32 geohash of (lat, lon)."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_center(geohash: str) -> tuple[float, float]:
+    """(lat, lon) of the centre of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for ch in geohash:
+        value = _BASE32.index(ch)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+async def _nominatim_get(lat: float, lon: float, language: str, client: httpx.AsyncClient) -> dict:
+    resp = await client.get(
+        NOMINATIM_REVERSE_URL,
+        params={
+            "lat": lat,
+            "lon": lon,
+            "format": "json",
+            "addressdetails": 1,
+        },
+        headers={
+            "Accept-Language": language,
+            "User-Agent": "Mimora/1.0",  # Nominatim requires a User-Agent
+        },
+    )
+    if resp.status_code == 429:
+        retry_after = resp.headers.get("Retry-After", "")
+        nominatim_scheduler.backoff(float(retry_after) if retry_after.isdigit() else NOMINATIM_BACKOFF_SECONDS)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def nominatim_reverse(
+    lat: float,
+    lon: float,
+    language: str = GEOCODE_LANGUAGE,
+    client: httpx.AsyncClient | None = None,
+    priority: int = INTERACTIVE,
+) -> dict:
+    """Single reverse lookup against Nominatim, paced by nominatim_scheduler.
+
+    Raises UpstreamBusy if the call can't start within GEOCODE_DEADLINE.
+    """
+    client = client or http_clients.get("nominatim")
+    return await nominatim_scheduler.submit(
+        lambda: _nominatim_get(lat, lon, language, client),
+        priority=priority,
+        timeout=GEOCODE_DEADLINE,
+    )
+
+
+async def reverse_geocode(
+    lat: float,
+    lon: float,
+    language: str = GEOCODE_LANGUAGE,
+    client: httpx.AsyncClient | None = None,
+    priority: int = INTERACTIVE,
+) -> dict:
+    """Reverse geocode (lat, lon): offline dataset first, then cached Nominatim.
+
+    Raises if Nominatim is needed, fails, and nothing is cached.
+    """
+    local = offline_geocoder.reverse(lat, lon)
+    if local is not None:
+        return local
+
+    cell = geohash_encode(lat, lon, GEOCODE_GEOHASH_PRECISION)
+    center_lat, center_lon = geohash_center(cell)
+    return await geocode_cache.get_or_fetch(
+        (cell, language),
+        lambda: nominatim_reverse(center_lat, center_lon, language, client, priority),
+    )
+
+
+GEOCODE_GEOHASH_PRECISION = int(os.getenv("GEOCODE_GEOHASH_PRECISION", "7"))
+# How long a caller may wait for a Nominatim slot before we give up (seconds)
+GEOCODE_DEADLINE = float(os.getenv("GEOCODE_DEADLINE", "5"))
+NOMINATIM_BACKOFF_SECONDS = 30.0
+
+# Nominatim's usage policy allows at most 1 request/second from the whole app,
+# but this bucket is per process: NOMINATIM_RATE is the app-wide budget and is
+# split across the WEB_CONCURRENCY uvicorn workers. It is not shared between
+# instances, so size NOMINATIM_RATE for the instance count when scaling out.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+nominatim_scheduler = UpstreamScheduler(
+    "nominatim",
+    rate=float(os.getenv("NOMINATIM_RATE", "1")) / WEB_CONCURRENCY,
+    max_queue=int(os.getenv("NOMINATIM_QUEUE_SIZE", "50")),
+)
+
+geocode_cache = TTLCache(
+    "Geocode",
+    maxsize=int(os.getenv("GEOCODE_CACHE_SIZE", "20000")),
+    ttl=float(os.getenv("GEOCODE_CACHE_TTL", "86400")),
+    stale_ttl=float(os.getenv("GEOCODE_CACHE_STALE_TTL", str(7 * 86400))),
+)
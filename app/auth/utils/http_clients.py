@@ -0,0 +1,174 @@
+# utils/http_clients.py
+"""
+Shared, pooled httpx clients for outbound calls.
+
+One AsyncClient per upstream (Nominatim, Meon, SendGrid, Google JWKS) lives
+for the lifetime of the app, so keep-alive connections are reused and calls
+don't pay DNS + TCP + TLS setup every time. Each upstream has its own
+connection limits and timeout; HTTP/2 is used where enabled and the `h2`
+package is installed.
+
+Routes get a client through a dependency:
+
+    from app.auth.utils.http_clients import upstream_client
+
+    @router.post("/kyc/start/{artist_id}")
+    async def start_kyc(..., meon: httpx.AsyncClient = Depends(upstream_client("meon"))):
+        resp = await meon.post(...)
+
+Tests swap the network out with a mock transport:
+
+    http_clients.use_transport(httpx.MockTransport(handler))
+"""
+
+import importlib.util
+import logging
+import os
+import time
+from typing import NamedTuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class Upstream(NamedTuple):
+    timeout: float
+    max_connections: int
+    max_keepalive: int
+    http2: bool = False
+    keepalive_expiry: float = 30.0
+
+
+class UpstreamStats:
+    """Per-upstream request counters, updated by _MeteredTransport."""
+
+    __slots__ = ("requests", "failures", "in_flight", "total_seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """Wraps the real transport to count requests, failures and latency."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, stats: UpstreamStats):
+        self.inner = inner
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await self.inner.handle_async_request(request)
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.total_seconds += time.perf_counter() - start
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class HTTPClientRegistry:
+    """Named, lazily created AsyncClients that are closed together on shutdown."""
+
+    def __init__(self):
+        self._upstreams: dict[str, Upstream] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, UpstreamStats] = {}
+        self._transport: httpx.AsyncBaseTransport | None = None
+
+    def register(self, name: str, upstream: Upstream) -> None:
+        self._upstreams[name] = upstream
+        self._stats.setdefault(name, UpstreamStats())
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        upstream = self._upstreams[name]
+        http2 = upstream.http2 and _HTTP2_AVAILABLE
+        if upstream.http2 and not _HTTP2_AVAILABLE:
+            logger.warning(f"HTTP/2 requested for {name} but h2 is not installed; using HTTP/1.1")
+        limits = httpx.Limits(
+            max_connections=upstream.max_connections,
+            max_keepalive_connections=upstream.max_keepalive,
+            keepalive_expiry=upstream.keepalive_expiry,
+        )
+        inner = self._transport or httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        return httpx.AsyncClient(
+            timeout=upstream.timeout,
+            transport=_MeteredTransport(inner, self._stats[name]),
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for `name`, creating it on first use."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._build(name)
+        return client
+
+    async def start(self) -> None:
+        """Open every registered client up front."""
+        for name in self._upstreams:
+            self.get(name)
+
+    async def stop(self) -> None:
+        """Close all clients and their pooled connections."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def use_transport(self, transport: httpx.AsyncBaseTransport | None) -> None:
+        """Route every client through `transport` (e.g. httpx.MockTransport); None restores the network."""
+        await self.stop()
+        self._transport = transport
+
+    def stats(self) -> dict:
+        out = {}
+        for name, stats in self._stats.items():
+            entry = {
+                "requests": stats.requests,
+                "failures": stats.failures,
+                "in_flight": stats.in_flight,
+                "avg_ms": round(stats.total_seconds / stats.requests * 1000, 2) if stats.requests else 0.0,
+                "max_connections": self._upstreams[name].max_connections,
+            }
+            # Pool occupancy from httpcore; absent for mock transports
+            client = self._clients.get(name)
+            pool = getattr(getattr(getattr(client, "_transport", None), "inner", None), "_pool", None)
+            connections = getattr(pool, "connections", None)
+            if connections is not None:
+                entry["connections"] = len(connections)
+                entry["idle_connections"] = sum(1 for c in connections if c.is_idle())
+            out[name] = entry
+        return out
+
+
+def upstream_client(name: str):
+    """FastAPI dependency factory returning the shared client for `name`."""
+    def dependency() -> httpx.AsyncClient:
+        return http_clients.get(name)
+    return dependency
+
+
+_HTTP2 = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+http_clients = HTTPClientRegistry()
+# Nominatim's usage policy allows ~1 request/second, so a tiny pool is plenty
+http_clients.register("nominatim", Upstream(timeout=10.0, max_connections=2, max_keepalive=2, http2=_HTTP2))
+http_clients.register("meon", Upstream(
+    timeout=float(os.getenv("MEON_TIMEOUT", "30")),
+    max_connections=int(os.getenv("MEON_MAX_CONNECTIONS", "20")),
+    max_keepalive=10,
+    http2=_HTTP2,
+))
+http_clients.register("sendgrid", Upstream(timeout=10.0, max_connections=10, max_keepalive=10, http2=_HTTP2))
+http_clients.register("google", Upstream(timeout=10.0, max_connections=2, max_keepalive=1, http2=_HTTP2))
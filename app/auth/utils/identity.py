@@ -0,0 +1,109 @@
+# utils/identity.py
+"""
+Single-round-trip identity resolution across the customer and artist tables.
+
+Instead of probing `customer` and `artists` one key at a time (firebase_uid,
+then email, then phone_number), `resolve_identity` builds one UNION ALL of
+indexed lookups, orders the hits by priority, and joins the matching rows
+back in the same statement.
+
+Usage:
+    from app.auth.utils.identity import resolve_identity
+
+    result = await resolve_identity(db, email=email, tables=("customer", "artist"))
+    customer = result.row("customer")
+    if result.first("artist"):
+        ...
+"""
+
+from typing import NamedTuple
+
+from sqlalchemy import Integer, String, and_, literal_column, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import Artist, User
+
+# Table name -> model; lookup keys in priority order
+_MODELS = {"customer": User, "artist": Artist}
+_KEYS = ("firebase_uid", "email", "phone_number")
+
+
+class IdentityMatch(NamedTuple):
+    table: str       # "customer" | "artist"
+    matched_on: str  # "firebase_uid" | "email" | "phone_number"
+    row: object      # User | Artist instance
+
+
+class IdentityResolution:
+    """Matches in priority order: table order first, then key order."""
+
+    def __init__(self, matches: list[IdentityMatch]):
+        self.matches = matches
+
+    def first(self, table: str | None = None, matched_on: str | None = None) -> IdentityMatch | None:
+        for match in self.matches:
+            if (table is None or match.table == table) and (matched_on is None or match.matched_on == matched_on):
+                return match
+        return None
+
+    def row(self, table: str):
+        """Highest-priority row from `table`, or None."""
+        match = self.first(table)
+        return match.row if match else None
+
+    def __bool__(self):
+        return bool(self.matches)
+
+
+async def resolve_identity(
+    db: AsyncSession,
+    *,
+    firebase_uid: str | None = None,
+    email: str | None = None,
+    phone_number: str | None = None,
+    tables: tuple = ("customer", "artist"),
+) -> IdentityResolution:
+    """
+    Look up every customer/artist row matching any of the given keys in one
+    SQL round trip. Keys that are None are skipped.
+    """
+    values = {"firebase_uid": firebase_uid, "email": email, "phone_number": phone_number}
+
+    branches = []
+    for table_rank, table in enumerate(tables):
+        model = _MODELS[table]
+        for key_rank, key in enumerate(_KEYS):
+            if not values[key]:
+                continue
+            branches.append(
+                select(
+                    literal_column(f"'{table}'", String).label("tbl"),
+                    literal_column(f"'{key}'", String).label("matched_on"),
+                    literal_column(str(table_rank * len(_KEYS) + key_rank), Integer).label("priority"),
+                    model.id.label("row_id"),
+                ).where(getattr(model, key) == values[key])
+            )
+
+    if not branches:
+        return IdentityResolution([])
+
+    hits = union_all(*branches).subquery("identity_hits")
+    stmt = select(hits.c.tbl, hits.c.matched_on).select_from(hits)
+    entities = []
+    for table in tables:
+        model = _MODELS[table]
+        stmt = stmt.add_columns(model).outerjoin(
+            model, and_(hits.c.tbl == table, model.id == hits.c.row_id)
+        )
+        entities.append(table)
+    stmt = stmt.order_by(hits.c.priority)
+
+    matches = []
+    seen = set()
+    for tbl, matched_on, *rows in (await db.execute(stmt)).all():
+        row = rows[entities.index(tbl)]
+        if row is None or (tbl, row.id) in seen:
+            continue
+        seen.add((tbl, row.id))
+        matches.append(IdentityMatch(tbl, matched_on, row))
+    return IdentityResolution(matches)
@@ -0,0 +1,135 @@
+# utils/jwks.py
+"""
+In-memory cache of Google's Firebase ID-token signing keys.
+
+Keys are fetched from Google's JWKS endpoint, kept for the max-age advertised
+in the Cache-Control header, and refreshed by a background asyncio task a
+little before they expire. Lookups on the request path are a dict read and
+never touch the network: a kid we don't have (Google rotated keys since our
+last refresh) or keys past their max-age only wake the background task early,
+at most once per on_demand_interval, and the request goes on without waiting.
+
+Usage:
+    from app.auth.utils.jwks import firebase_key_cache
+
+    await firebase_key_cache.start()     # app startup
+    key = firebase_key_cache.get_key(kid)
+    if key is None:
+        firebase_key_cache.request_refresh()   # never waits
+    await firebase_key_cache.stop()      # app shutdown
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+
+import jwt
+
+from app.auth.utils.http_clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_JWKS_URL = os.getenv(
+    "FIREBASE_JWKS_URL",
+    "https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com",
+)
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSCache:
+    """Holds the current kid -> public key map for one JWKS endpoint."""
+
+    def __init__(
+        self,
+        url: str,
+        refresh_margin: float = 300.0,
+        retry_interval: float = 30.0,
+        default_max_age: float = 3600.0,
+        on_demand_interval: float = 60.0,
+    ):
+        self.url = url
+        self.refresh_margin = refresh_margin  # refresh this many seconds before expiry
+        self.retry_interval = retry_interval  # back-off after a failed fetch
+        self.default_max_age = default_max_age  # used if Cache-Control is missing
+        self.on_demand_interval = on_demand_interval  # min gap between request_refresh() wake-ups
+        self._keys: dict = {}
+        self._expires_at = 0.0
+        self._last_on_demand = 0.0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_fresh(self) -> bool:
+        """True when keys are loaded and still inside their max-age."""
+        return bool(self._keys) and time.time() < self._expires_at
+
+    def get_key(self, kid: str):
+        """Return the public key for `kid`, or None if it is unknown."""
+        return self._keys.get(kid)
+
+    async def refresh(self) -> None:
+        """Download the key set and swap it in atomically."""
+        resp = await http_clients.get("google").get(self.url)
+        resp.raise_for_status()
+
+        jwk_set = jwt.PyJWKSet.from_dict(resp.json())
+        keys = {k.key_id: k.key for k in jwk_set.keys if k.key_id}
+
+        match = _MAX_AGE_RE.search(resp.headers.get("cache-control", ""))
+        max_age = float(match.group(1)) if match else self.default_max_age
+
+        self._keys = keys
+        self._expires_at = time.time() + max_age
+        logger.info(f"Loaded {len(keys)} signing keys from {self.url} (max-age={int(max_age)}s)")
+
+    def request_refresh(self) -> None:
+        """Have the background task refetch now, at most once per on_demand_interval.
+
+        Safe to call from synchronous code on the request path: it only sets
+        an event and never waits for the download.
+        """
+        now = time.monotonic()
+        if now - self._last_on_demand < self.on_demand_interval:
+            return
+        self._last_on_demand = now
+        self._wake.set()
+
+    async def _safe_refresh(self) -> float:
+        """Refresh once; returns the delay until the next scheduled refresh."""
+        try:
+            await self.refresh()
+            return max(self.retry_interval, self._expires_at - time.time() - self.refresh_margin)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"JWKS refresh failed for {self.url}: {e}")
+            return self.retry_interval
+
+    async def _run(self, delay: float) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            delay = await self._safe_refresh()
+
+    async def start(self) -> None:
+        """Load the keys, then keep them refreshed in the background (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(await self._safe_refresh()))
+    async def stop(self) -> None:
+        """Cancel the background refresher."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+firebase_key_cache = JWKSCache(FIREBASE_JWKS_URL)
@@ -0,0 +1,215 @@
+# utils/nearby.py
+"""
+Nearby-artist search on PostGIS.
+
+One statement per page:
+
+    WHERE is_active AND kyc_verified AND profile_completed     -- partial GiST index
+      AND ST_DWithin(location, :point, :radius_m)              -- index-assisted radius
+      AND (location <-> :point, id) > (:last_distance, :last_id)  -- keyset cursor
+    ORDER BY location <-> :point, id                           -- KNN index scan
+    LIMIT :limit + 1
+
+Only the card columns are selected. Pages are walked with an opaque cursor
+(the last row's distance and id) instead of OFFSET, so page N costs the same
+as page 1.
+
+`find_ranked_artists` orders the same candidate set by relevance instead
+(utils/ranking.py), ranking up to MAX_RANK_CANDIDATES of the nearest.
+`find_serving_artists` answers the reverse question - whose travel area
+contains this point - from the GiST-indexed, trigger-maintained `coverage`
+polygon.
+
+Usage:
+    from app.auth.utils.nearby import find_nearby_artists
+
+    page = await find_nearby_artists(db, lat, lon, radius_km=10, limit=20, cursor=None)
+"""
+
+import base64
+import json
+import uuid
+from typing import NamedTuple
+
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import Artist
+from app.auth.utils.ranking import CandidateColumns, rank_page, score_candidates
+
+MAX_RADIUS_KM = 50
+MAX_PAGE_SIZE = 50
+
+# Compact projection for result cards; everything else comes from /artists/{id}
+CARD_COLUMNS = (
+    Artist.id,
+    Artist.name,
+    Artist.username,
+    Artist.profile_pic_url,
+    Artist.profession,
+    Artist.city,
+    Artist.rating,
+    Artist.total_reviews,
+    Artist.booking_mode,
+    Artist.latitude,
+    Artist.longitude,
+)
+
+# Extra columns the relevance ranking needs (utils/ranking.py)
+RANKING_COLUMNS = (Artist.skills, Artist.event_types)
+# Relevance sort ranks at most this many of the nearest candidates when served from the DB
+MAX_RANK_CANDIDATES = 2000
+
+# Must match the predicate of the partial index ix_artists_bookable_location
+BOOKABLE = (
+    Artist.is_active == True,  # noqa: E712 - SQL boolean comparison
+    Artist.kyc_verified == True,  # noqa: E712
+    Artist.profile_completed == True,  # noqa: E712
+)
+
+
+class InvalidCursor(ValueError):
+    """The pagination cursor could not be decoded."""
+
+
+class NearbyPage(NamedTuple):
+    items: list[dict]
+    next_cursor: str | None
+
+
+def encode_cursor(key: float, artist_id) -> str:
+    """Opaque cursor for (sort key, id): distance in metres, or relevance score."""
+    raw = json.dumps([key, str(artist_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, artist_id = json.loads(raw)
+        return float(key), uuid.UUID(artist_id)
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def geography_point(lat: float, lon: float):
+    """SQL expression for a geography POINT at (lat, lon)."""
+    return cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326), Geography)
+
+
+def card_from_row(row, distance_m: float | None = None) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "username": row.username,
+        "profile_pic_url": row.profile_pic_url,
+        "profession": row.profession or [],
+        "city": row.city,
+        "rating": row.rating,
+        "total_reviews": row.total_reviews,
+        "booking_mode": row.booking_mode,
+        "distance_km": round(distance_m / 1000, 2) if distance_m is not None else None,
+    }
+
+
+def ranked_page(
+    cols: CandidateColumns,
+    rows: list,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int,
+    cursor: str | None = None,
+    **preferences,
+) -> NearbyPage:
+    """One page of `rows` (parallel to `cols`) by relevance score; the cursor is (score, id)."""
+    scores, distances = score_candidates(cols, lat, lon, radius_km, **preferences)
+    after = decode_cursor(cursor) if cursor else None
+    picked = rank_page(cols, scores, limit, after)
+    has_more = len(picked) > limit
+    picked = picked[:limit]
+    items = [card_from_row(rows[i], float(distances[i])) for i in picked]
+    next_cursor = encode_cursor(float(scores[picked[-1]]), cols.ids[picked[-1]]) if has_more else None
+    return NearbyPage(items, next_cursor)
+
+
+async def find_ranked_artists(
+    db: AsyncSession,
+    lat: float,
+    lon: float,
+    radius_km: float = 10,
+    limit: int = 20,
+    cursor: str | None = None,
+    **preferences,
+) -> NearbyPage:
+    """Bookable artists within `radius_km`, best match first (see utils/ranking.py)."""
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    point = geography_point(lat, lon)
+    stmt = (
+        select(*CARD_COLUMNS, *RANKING_COLUMNS)
+        .where(*BOOKABLE, func.ST_DWithin(Artist.location, point, radius_km * 1000))
+        .order_by(Artist.location.op("<->")(point), Artist.id)
+        .limit(MAX_RANK_CANDIDATES)
+    )
+    rows = (await db.execute(stmt)).all()
+    return ranked_page(CandidateColumns(rows), rows, lat, lon, radius_km, limit, cursor, **preferences)
+
+
+async def find_nearby_artists(
+    db: AsyncSession,
+    lat: float,
+    lon: float,
+    radius_km: float = 10,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> NearbyPage:
+    """One page of bookable artists within `radius_km` of (lat, lon), nearest first."""
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    point = geography_point(lat, lon)
+    return await _distance_page(
+        db, point, func.ST_DWithin(Artist.location, point, radius_km * 1000), limit, cursor
+    )
+
+
+async def find_serving_artists(
+    db: AsyncSession,
+    lat: float,
+    lon: float,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> NearbyPage:
+    """One page of bookable artists whose travel coverage contains (lat, lon), nearest first.
+
+    `coverage` is the trigger-maintained ST_Buffer(location, travel_radius),
+    so this is a GiST probe rather than a distance check against every
+    artist's own radius.
+    """
+    point = geography_point(lat, lon)
+    return await _distance_page(db, point, func.ST_Intersects(Artist.coverage, point), limit, cursor)
+
+
+async def _distance_page(db: AsyncSession, point, area, limit: int, cursor: str | None) -> NearbyPage:
+    """Bookable artists matching `area`, ordered by distance to `point` with a keyset cursor."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    distance = Artist.location.op("<->")(point)
+
+    stmt = (
+        select(*CARD_COLUMNS, distance.label("distance_m"))
+        .where(*BOOKABLE, area)
+        .order_by(distance, Artist.id)
+        .limit(limit + 1)  # one extra row tells us whether there is a next page
+    )
+    if cursor:
+        last_distance, last_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(distance, Artist.id) > tuple_(literal(last_distance), literal(last_id)))
+
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [card_from_row(row, row.distance_m) for row in rows]
+    next_cursor = encode_cursor(rows[-1].distance_m, rows[-1].id) if has_more else None
+    return NearbyPage(items, next_cursor)
@@ -0,0 +1,162 @@
+# utils/offline_geocoder.py
+"""
+Offline reverse geocoding from a local boundary dataset.
+
+Loads pincode / locality / city / state polygons (or OSM-derived place
+points) into shapely STRtrees once at startup and answers reverse lookups
+in-process, so /geocode/reverse only falls back to Nominatim for points the
+dataset doesn't cover.
+
+    GEOCODE_OFFLINE_DATASET=/data/india_boundaries.geojson   build at startup
+    GEOCODE_OFFLINE_DATASET=/data/india_boundaries.pkl       prebuilt index
+
+A GeoJSON FeatureCollection is expected; each feature's properties hold any
+of the Nominatim address keys (postcode, suburb, city, state, country, ...).
+Building from GeoJSON parses every geometry, so large datasets should be
+prebuilt once with:
+
+    python -m app.auth.utils.offline_geocoder in.geojson out.pkl
+
+shapely is only imported when a dataset is configured.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import pickle
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Address keys copied from feature properties, most specific first
+ADDRESS_KEYS = (
+    "house_number", "road", "neighbourhood", "suburb", "village", "town",
+    "city", "county", "state_district", "state", "postcode", "country", "country_code",
+)
+
+
+class OfflineGeocoder:
+    """Point-in-polygon / nearest-place lookups over an in-memory STRtree."""
+
+    def __init__(self, polygons: list, polygon_props: list, points: list, point_props: list,
+                 max_point_distance: float = 0.02):
+        from shapely import STRtree, prepare
+
+        prepare(polygons)  # speeds up the repeated intersects() checks
+        self.polygon_props = polygon_props
+        self.point_props = point_props
+        # Smaller polygons are more specific: on overlap their properties win
+        self.polygon_areas = [geom.area for geom in polygons]
+        self.polygon_tree = STRtree(polygons) if polygons else None
+        self.point_tree = STRtree(points) if points else None
+        self.max_point_distance = max_point_distance  # degrees (~2km at 0.02)
+
+    @classmethod
+    def from_geojson(cls, path: str, **kwargs) -> "OfflineGeocoder":
+        from shapely.geometry import shape
+
+        with open(path) as f:
+            collection = json.load(f)
+
+        polygons, polygon_props, points, point_props = [], [], [], []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry")
+            if not geometry:
+                continue
+            geom = shape(geometry)
+            props = {k: v for k, v in (feature.get("properties") or {}).items() if k in ADDRESS_KEYS and v}
+            if geom.geom_type in ("Polygon", "MultiPolygon"):
+                polygons.append(geom)
+                polygon_props.append(props)
+            elif geom.geom_type == "Point":
+                points.append(geom)
+                point_props.append(props)
+        return cls(polygons, polygon_props, points, point_props, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "OfflineGeocoder":
+        """Load a GeoJSON dataset or a prebuilt .pkl index."""
+        if path.endswith(".pkl"):
+            with open(path, "rb") as f:
+                polygons, polygon_props, points, point_props = pickle.load(f)
+            return cls(polygons, polygon_props, points, point_props, **kwargs)
+        return cls.from_geojson(path, **kwargs)
+
+    def save(self, path: str) -> None:
+        """Write a prebuilt index that load() can read without parsing GeoJSON."""
+        polygons = list(self.polygon_tree.geometries) if self.polygon_tree is not None else []
+        points = list(self.point_tree.geometries) if self.point_tree is not None else []
+        with open(path, "wb") as f:
+            pickle.dump((polygons, self.polygon_props, points, self.point_props), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def reverse(self, lat: float, lon: float) -> dict | None:
+        """Nominatim-shaped result for (lat, lon), or None if the dataset doesn't cover it."""
+        from shapely import Point
+
+        point = Point(lon, lat)
+        address: dict = {}
+
+        if self.polygon_tree is not None:
+            hits = self.polygon_tree.query(point, predicate="intersects")
+            # Fill from the largest polygon down so the most specific one wins
+            for idx in sorted(hits, key=lambda i: self.polygon_areas[i], reverse=True):
+                address.update(self.polygon_props[idx])
+
+        if self.point_tree is not None:
+            nearest = self.point_tree.query_nearest(point, max_distance=self.max_point_distance)
+            if len(nearest):
+                # Nearest place fills gaps (locality names) but doesn't override a polygon hit
+                for key, value in self.point_props[nearest[0]].items():
+                    address.setdefault(key, value)
+
+        if not address:
+            return None
+
+        return {
+            "lat": str(lat),
+            "lon": str(lon),
+            "display_name": ", ".join(address[k] for k in ADDRESS_KEYS if k in address and k != "country_code"),
+            "address": address,
+            "source": "offline",
+        }
+
+    def stats(self) -> dict:
+        return {
+            "polygons": len(self.polygon_props),
+            "points": len(self.point_props),
+        }
+
+
+class OfflineGeocoderHolder:
+    """Loads the configured dataset off the event loop and exposes it once ready."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.geocoder: OfflineGeocoder | None = None
+
+    async def start(self) -> None:
+        if not self.path or self.geocoder is not None:
+            return
+        try:
+            self.geocoder = await asyncio.to_thread(OfflineGeocoder.load, self.path)
+            logger.info(f"Offline geocoder loaded from {self.path}: {self.geocoder.stats()}")
+        except Exception as e:
+            # Nominatim still answers everything; don't block startup on a bad dataset
+            logger.error(f"Failed to load offline geocoder dataset {self.path}: {e}")
+
+    def reverse(self, lat: float, lon: float) -> dict | None:
+        if self.geocoder is None:
+            return None
+        return self.geocoder.reverse(lat, lon)
+
+
+offline_geocoder = OfflineGeocoderHolder(os.getenv("GEOCODE_OFFLINE_DATASET"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m app.auth.utils.offline_geocoder <in.geojson> <out.pkl>")
+    index = OfflineGeocoder.from_geojson(sys.argv[1])
+    index.save(sys.argv[2])
+    print(f"Wrote {sys.argv[2]}: {index.stats()}")
@@ -1,16 +1,69 @@
 # utils/otp.py
+import asyncio
+import hashlib
+import hmac
+import os
 import random
-import bcrypt
+import secrets
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server-side secret mixed into every OTP hash; must be shared by all workers
+OTP_PEPPER = os.getenv("OTP_PEPPER")
+
+# Versioned prefix so the scheme can be rotated later; legacy rows are bcrypt ("$2b$...")
+OTP_HASH_PREFIX = "$h1$"
+
+_legacy_executor: ProcessPoolExecutor | None = None
+
+
 def generate_otp():
     return str(random.randint(100000, 999999))
 
+def _pepper() -> bytes:
+    if not OTP_PEPPER:
+        raise ValueError("OTP_PEPPER is not loaded from .env")
+    return OTP_PEPPER.encode()
+
+def _hmac_digest(otp: str, salt: str) -> str:
+    return hmac.new(_pepper(), f"{salt}:{otp}".encode(), hashlib.sha256).hexdigest()
+
 def hash_otp(otp: str):
-    return bcrypt.hashpw(otp.encode(), bcrypt.gensalt()).decode()
+    """Peppered HMAC-SHA256 of the OTP with a per-row salt: $h1$<salt>$<digest>."""
+    salt = secrets.token_hex(8)
+    return f"{OTP_HASH_PREFIX}{salt}${_hmac_digest(otp, salt)}"
 
-def verify_otp(otp: str, otp_hash: str):
+def _bcrypt_checkpw(otp: str, otp_hash: str) -> bool:
+    # Module-level so it can be pickled into the process pool
     return bcrypt.checkpw(otp.encode(), otp_hash.encode())
 
+def _get_legacy_executor() -> ProcessPoolExecutor:
+    global _legacy_executor
+    if _legacy_executor is None:
+        _legacy_executor = ProcessPoolExecutor(max_workers=int(os.getenv("OTP_LEGACY_WORKERS", "1")))
+    return _legacy_executor
+
+async def verify_otp(otp: str, otp_hash: str):
+    """
+    Check an OTP against its stored hash.
+    HMAC hashes are verified inline with a constant-time compare; legacy bcrypt
+    hashes (issued before the switch, valid for at most 5 minutes) are checked
+    in a process pool so they never block the event loop.
+    """
+    if otp_hash.startswith(OTP_HASH_PREFIX):
+        try:
+            salt, digest = otp_hash[len(OTP_HASH_PREFIX):].split("$", 1)
+        except ValueError:
+            return False
+        return hmac.compare_digest(_hmac_digest(otp, salt), digest)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_legacy_executor(), _bcrypt_checkpw, otp, otp_hash)
+
 def otp_expiry():
     return datetime.utcnow() + timedelta(minutes=5)
@@ -0,0 +1,83 @@
+# utils/otp_reaper.py
+"""
+Background cleanup of expired OTP rows.
+
+Runs as an asyncio task for the lifetime of the app and periodically deletes
+expired rows from email_otps / email_artist_otps in bounded batches, so the
+OTP request handlers never do cleanup work and rows for emails that never
+come back are still removed. Relies on the expires_at index.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import delete, select
+
+from app.auth.database import AsyncSessionLocal
+from app.auth.utils.otp_store import OTP_MODELS
+
+logger = logging.getLogger(__name__)
+
+
+async def reap_expired_otps(batch_size: int = 1000) -> int:
+    """Delete all expired OTP rows, `batch_size` rows per statement. Returns rows deleted."""
+    total = 0
+    # expires_at is stored as naive UTC, so compare against utcnow rather than now()
+    cutoff = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        for model in OTP_MODELS.values():
+            while True:
+                expired_ids = (
+                    select(model.id)
+                    .where(model.expires_at < cutoff)
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                result = await db.execute(delete(model).where(model.id.in_(expired_ids)))
+                await db.commit()
+                total += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+    return total
+
+
+class OTPReaper:
+    """Periodic task wrapper around reap_expired_otps."""
+
+    def __init__(self, interval: float = 60.0, batch_size: int = 1000):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await reap_expired_otps(self.batch_size)
+                if deleted:
+                    logger.info(f"Reaped {deleted} expired OTP row(s)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"OTP reaper run failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+otp_reaper = OTPReaper(
+    interval=float(os.getenv("OTP_REAPER_INTERVAL", "60")),
+    batch_size=int(os.getenv("OTP_REAPER_BATCH_SIZE", "1000")),
+)
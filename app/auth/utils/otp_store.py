@@ -0,0 +1,246 @@
+# utils/otp_store.py
+"""
+Pluggable storage for email OTPs.
+
+Backends:
+    SQLOTPStore       - the email_otps / email_artist_otps tables (default)
+    KeyValueOTPStore  - any Redis-compatible async client; keys carry a
+                        native TTL and verification consumes the code with
+                        an atomic GETDEL
+    InMemoryKV        - in-process stand-in for a Redis client, for local
+                        development and tests
+
+Select the backend with OTP_STORE=sql|redis|memory (REDIS_URL for redis).
+
+Usage in routes:
+    from app.auth.utils.otp_store import otp_store, OTPVerificationError
+
+    await otp_store.issue(db, "customer", email, username, otp_hash, expires_at)
+    username = await otp_store.consume(db, "customer", email, otp)
+"""
+
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import EmailArtistOTP, EmailOTP
+from app.auth.utils.otp import verify_otp
+
+# Audience -> OTP table
+OTP_MODELS = {"customer": EmailOTP, "artist": EmailArtistOTP}
+
+# Keep KV entries a little past expiry so callers still get "OTP expired"
+# rather than "OTP not found" right after the deadline
+_EXPIRED_GRACE_SECONDS = 60
+
+# Repeat "send code" requests inside this window reuse the active OTP
+OTP_RESEND_COOLDOWN_SECONDS = int(os.getenv("OTP_RESEND_COOLDOWN", "60"))
+
+
+class ActiveOTP(NamedTuple):
+    username: str
+    sent_at: datetime     # naive UTC
+    expires_at: datetime  # naive UTC
+
+
+class OTPVerificationError(Exception):
+    """Raised by `consume`; str(e) is the client-facing detail."""
+
+
+class OTPStore(ABC):
+    """Interface every OTP backend implements."""
+
+    @abstractmethod
+    async def issue(self, db: AsyncSession, audience: str, email: str, username: str,
+                    otp_hash: str, expires_at: datetime) -> None:
+        """Store a new OTP for `email`, replacing or shadowing older ones."""
+
+    @abstractmethod
+    async def consume(self, db: AsyncSession, audience: str, email: str, otp: str) -> str:
+        """Verify `otp` for `email` and delete it; returns the stored username."""
+
+    @abstractmethod
+    async def latest_active(self, db: AsyncSession, audience: str, email: str) -> ActiveOTP | None:
+        """The newest unexpired OTP for `email`, if any."""
+
+    async def resend_after(self, db: AsyncSession, audience: str, email: str, username: str) -> int | None:
+        """
+        Seconds until a new code may be sent, if an unexpired OTP for the same
+        email/audience/username went out within the cooldown window; else None.
+        """
+        active = await self.latest_active(db, audience, email)
+        if active is None or active.username != username:
+            return None
+        now = datetime.utcnow()
+        if active.expires_at <= now:
+            return None
+        remaining = OTP_RESEND_COOLDOWN_SECONDS - (now - active.sent_at).total_seconds()
+        return math.ceil(remaining) if remaining > 0 else None
+
+
+class SQLOTPStore(OTPStore):
+    """OTP rows in Postgres (email_otps / email_artist_otps)."""
+
+    async def issue(self, db, audience, email, username, otp_hash, expires_at):
+        model = OTP_MODELS[audience]
+        # Expired rows are removed by the background reaper (utils/otp_reaper.py)
+        db.add(model(email=email, username=username, otp_hash=otp_hash, expires_at=expires_at))
+        await db.commit()
+
+    async def consume(self, db, audience, email, otp):
+        model = OTP_MODELS[audience]
+
+        # Get the latest OTP record for this email
+        otp_record = await db.scalar(
+            select(model)
+            .where(model.email == email)
+            .order_by(model.created_at.desc())
+            .limit(1)
+        )
+        if not otp_record:
+            raise OTPVerificationError("OTP not found")
+        if otp_record.expires_at < datetime.utcnow():
+            raise OTPVerificationError("OTP expired")
+        if not await verify_otp(otp, otp_record.otp_hash):
+            raise OTPVerificationError("Invalid OTP")
+
+        # Delete by id so two concurrent verifications can't both succeed
+        result = await db.execute(delete(model).where(model.id == otp_record.id))
+        await db.commit()
+        if not result.rowcount:
+            raise OTPVerificationError("OTP not found")
+        return otp_record.username
+
+    async def latest_active(self, db, audience, email):
+        model = OTP_MODELS[audience]
+        row = (await db.execute(
+            select(model.username, model.created_at, model.expires_at)
+            .where(model.email == email, model.expires_at > datetime.utcnow())
+            .order_by(model.created_at.desc())
+            .limit(1)
+        )).first()
+        return ActiveOTP(*row) if row else None
+
+
+class KeyValueOTPStore(OTPStore):
+    """
+    OTPs in a Redis-compatible store: one key per (audience, email), holding
+    the latest code. Only `get`, `set(..., ex=)`, `getdel` and `set(..., px=, nx=)`
+    are used, so any client exposing those async commands works.
+    """
+
+    def __init__(self, client, prefix: str = "otp"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, audience: str, email: str) -> str:
+        return f"{self.prefix}:{audience}:{email.lower()}"
+
+    async def issue(self, db, audience, email, username, otp_hash, expires_at):
+        ttl = max(1, math.ceil((expires_at - datetime.utcnow()).total_seconds()))
+        value = json.dumps({
+            "username": username,
+            "otp_hash": otp_hash,
+            "expires_at": expires_at.timestamp(),
+            "sent_at": datetime.utcnow().timestamp(),
+        })
+        await self.client.set(self._key(audience, email), value, ex=ttl + _EXPIRED_GRACE_SECONDS)
+
+    async def consume(self, db, audience, email, otp):
+        key = self._key(audience, email)
+
+        # Atomic get-and-delete: only one concurrent verifier can ever see the code
+        raw = await self.client.getdel(key)
+        if raw is None:
+            raise OTPVerificationError("OTP not found")
+        record = json.loads(raw)
+
+        remaining = record["expires_at"] - datetime.utcnow().timestamp()
+        if remaining <= 0:
+            raise OTPVerificationError("OTP expired")
+
+        if not await verify_otp(otp, record["otp_hash"]):
+            # A mistyped code shouldn't burn the OTP: put it back unless a
+            # newer one was issued in the meantime
+            await self.client.set(key, raw, px=int(remaining * 1000) + _EXPIRED_GRACE_SECONDS * 1000, nx=True)
+            raise OTPVerificationError("Invalid OTP")
+
+        return record["username"]
+
+    async def latest_active(self, db, audience, email):
+        raw = await self.client.get(self._key(audience, email))
+        if raw is None:
+            return None
+        record = json.loads(raw)
+        if "sent_at" not in record:
+            return None
+        expires_at = datetime.fromtimestamp(record["expires_at"])
+        if expires_at <= datetime.utcnow():
+            return None
+        return ActiveOTP(record["username"], datetime.fromtimestamp(record["sent_at"]), expires_at)
+
+
+class InMemoryKV:
+    """
+    Minimal in-process implementation of the Redis commands KeyValueOTPStore
+    needs, with lazy TTL expiry. Single-process only.
+    """
+
+    def __init__(self):
+        self._data: dict = {}  # key -> (value, expires_at monotonic or None)
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        return True
+
+    async def getdel(self, key):
+        value = self._live(key)
+        self._data.pop(key, None)
+        return value
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._live(key) is not None:
+                removed += 1
+            self._data.pop(key, None)
+        return removed
+
+
+def build_otp_store(backend: str | None = None) -> OTPStore:
+    backend = (backend or os.getenv("OTP_STORE", "sql")).lower()
+    if backend == "sql":
+        return SQLOTPStore()
+    if backend == "memory":
+        return KeyValueOTPStore(InMemoryKV())
+    if backend == "redis":
+        # Optional dependency - only needed when the redis backend is selected
+        import redis.asyncio as redis
+        return KeyValueOTPStore(redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+    raise ValueError(f"Unknown OTP_STORE backend: {backend}")
+
+
+otp_store = build_otp_store()
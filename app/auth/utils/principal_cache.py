@@ -0,0 +1,125 @@
+# utils/principal_cache.py
+"""
+Cross-request cache of authenticated principals (customers and artists).
+
+get_current_user / get_current_artist resolve the principal for a token's
+firebase_uid once and keep a compact, read-only snapshot of the row for a
+short TTL. Write paths call `invalidate(row_id)` after committing so the next
+request reloads fresh data. The cache is per process, so the TTL bounds how
+stale another worker can be.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from geoalchemy2 import Geography
+
+from app.auth.models import Artist, User
+
+
+def _snapshot_fields(model) -> tuple:
+    # Geography columns are skipped: they aren't serialisable and no reader needs them
+    return tuple(c.key for c in model.__table__.columns if not isinstance(c.type, Geography))
+
+
+class _Principal:
+    """Immutable-ish snapshot of a DB row, built from its column attributes."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        snapshot = cls.__new__(cls)
+        for field in cls.__slots__:
+            object.__setattr__(snapshot, field, getattr(row, field, None))
+        return snapshot
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only; load the row to modify it")
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class UserPrincipal(_Principal):
+    __slots__ = _snapshot_fields(User)
+
+
+class ArtistPrincipal(_Principal):
+    __slots__ = _snapshot_fields(Artist)
+
+
+class PrincipalCache:
+    """Bounded LRU of firebase_uid -> principal snapshot with a fixed TTL."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()  # uid -> (expires_at, principal)
+        self._uids_by_id: dict = {}  # row id -> {uid, ...} for invalidation
+        self._lock = threading.Lock()
+
+    def get(self, firebase_uid: str):
+        with self._lock:
+            entry = self._entries.get(firebase_uid)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                self._drop(firebase_uid)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(firebase_uid)
+            self.hits += 1
+            return principal
+
+    def put(self, firebase_uid: str, principal) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if firebase_uid in self._entries:
+                self._drop(firebase_uid)
+            self._entries[firebase_uid] = (time.monotonic() + self.ttl, principal)
+            self._uids_by_id.setdefault(principal.id, set()).add(firebase_uid)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, row_id) -> None:
+        """Forget every cached entry that points at the row with this id."""
+        with self._lock:
+            for uid in list(self._uids_by_id.get(row_id, ())):
+                self._drop(uid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._uids_by_id.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _drop(self, firebase_uid: str) -> None:
+        # Caller holds the lock
+        _, principal = self._entries.pop(firebase_uid)
+        uids = self._uids_by_id.get(principal.id)
+        if uids is not None:
+            uids.discard(firebase_uid)
+            if not uids:
+                del self._uids_by_id[principal.id]
+
+
+_PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+_PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+user_principals = PrincipalCache(maxsize=_PRINCIPAL_CACHE_SIZE, ttl=_PRINCIPAL_CACHE_TTL)
+artist_principals = PrincipalCache(maxsize=_PRINCIPAL_CACHE_SIZE, ttl=_PRINCIPAL_CACHE_TTL)
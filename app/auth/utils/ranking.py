@@ -0,0 +1,203 @@
+# utils/ranking.py
+"""
+Vectorized ranking of artist candidates.
+
+Candidates are held column-wise (CandidateColumns): float32 coordinates,
+float32 rating / review count, skills and event types as uint64 bitsets over
+a shared TagVocabulary, and booking_mode as a small integer code. Scoring a
+batch is a handful of NumPy operations over those arrays instead of a Python
+loop over rows, so thousands of candidates rank in about a millisecond.
+
+Score (each term in [0, 1], combined with RankingWeights):
+
+    distance   1 - d / radius
+    rating     Bayesian average: (rating * n + PRIOR_RATING * PRIOR_REVIEWS) / (n + PRIOR_REVIEWS) / 5
+    skills     |requested & artist| / |requested|          (only if skills were requested)
+    events     same for event types                         (only if event types were requested)
+    booking    1 if booking_mode matches (or artist offers "both")
+
+Benchmark against a per-row Python loop: `python benchmark_ranking.py`.
+"""
+
+import bisect
+from typing import NamedTuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+PRIOR_RATING = 3.5
+PRIOR_REVIEWS = 5.0
+
+BOOKING_MODES = ("instant", "flexi", "both")
+_BOOKING_CODES = {mode: i + 1 for i, mode in enumerate(BOOKING_MODES)}  # 0 = unset
+_BOTH = _BOOKING_CODES["both"]
+
+if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+else:
+    _POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        as_bytes = words.view(np.uint8).reshape(*words.shape[:-1], -1)
+        return _POPCOUNT8[as_bytes].sum(axis=-1, dtype=np.int32)
+
+
+class RankingWeights(NamedTuple):
+    distance: float = 0.35
+    rating: float = 0.25
+    skills: float = 0.2
+    events: float = 0.1
+    booking: float = 0.1
+
+
+class TagVocabulary:
+    """Assigns each tag string a bit position; grows as new tags appear."""
+
+    def __init__(self):
+        self._bits: dict[str, int] = {}
+
+    def bit(self, tag: str) -> int:
+        bit = self._bits.get(tag)
+        if bit is None:
+            bit = self._bits[tag] = len(self._bits)
+        return bit
+
+    @property
+    def words(self) -> int:
+        return max(1, (len(self._bits) + 63) // 64)
+
+    def mask(self, tags) -> int:
+        """Python-int bitmask of `tags`, registering new ones."""
+        mask = 0
+        for tag in tags or ():
+            mask |= 1 << self.bit(tag)
+        return mask
+
+    def encode(self, tags, words: int | None = None, grow: bool = True) -> np.ndarray:
+        """uint64 bitset of `tags`; unknown tags are skipped unless `grow`."""
+        out = np.zeros(words or self.words, dtype=np.uint64)
+        for tag in tags or ():
+            bit = self.bit(tag) if grow else self._bits.get(tag)
+            if bit is not None and bit < out.size * 64:
+                out[bit // 64] |= np.uint64(1 << (bit % 64))
+        return out
+
+
+def _bitsets(masks: list[int], words: int) -> np.ndarray:
+    """(len(masks), words) uint64 array from Python-int bitmasks."""
+    out = np.empty((len(masks), words), dtype=np.uint64)
+    for w in range(words):
+        shift = 64 * w
+        out[:, w] = np.fromiter(((m >> shift) & 0xFFFFFFFFFFFFFFFF for m in masks), dtype=np.uint64, count=len(masks))
+    return out
+
+
+class CandidateColumns:
+    """Column-wise snapshot of candidate artists."""
+
+    def __init__(self, rows, skill_vocab: TagVocabulary | None = None, event_vocab: TagVocabulary | None = None):
+        rows = list(rows)
+        self.skill_vocab = skill_vocab or TagVocabulary()
+        self.event_vocab = event_vocab or TagVocabulary()
+
+        n = len(rows)
+        self.ids = [row.id for row in rows]
+        self.lat = np.fromiter((row.latitude for row in rows), dtype=np.float32, count=n)
+        self.lon = np.fromiter((row.longitude for row in rows), dtype=np.float32, count=n)
+        self.rating = np.fromiter((row.rating or 0.0 for row in rows), dtype=np.float32, count=n)
+        self.reviews = np.fromiter((row.total_reviews or 0 for row in rows), dtype=np.float32, count=n)
+        self.booking = np.fromiter((_BOOKING_CODES.get(row.booking_mode, 0) for row in rows), dtype=np.int8, count=n)
+
+        self.skills = _bitsets([self.skill_vocab.mask(row.skills) for row in rows], self.skill_vocab.words)
+        self.events = _bitsets([self.event_vocab.mask(row.event_types) for row in rows], self.event_vocab.words)
+
+        # Position of each id in UUID order, for deterministic tie-breaks / cursors
+        order = sorted(range(n), key=lambda i: self.ids[i])
+        self.id_rank = np.empty(n, dtype=np.int32)
+        self.id_rank[order] = np.arange(n, dtype=np.int32)
+        self.sorted_ids = [self.ids[i] for i in order]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, idx: np.ndarray) -> "CandidateColumns":
+        """The candidates at positions `idx`, sharing vocabularies and id order with these."""
+        sub = object.__new__(CandidateColumns)
+        sub.skill_vocab = self.skill_vocab
+        sub.event_vocab = self.event_vocab
+        sub.ids = [self.ids[i] for i in idx]
+        sub.lat = self.lat[idx]
+        sub.lon = self.lon[idx]
+        sub.rating = self.rating[idx]
+        sub.reviews = self.reviews[idx]
+        sub.booking = self.booking[idx]
+        sub.skills = self.skills[idx]
+        sub.events = self.events[idx]
+        # Ranks stay relative to the full sorted_ids, which rank_page bisects into
+        sub.id_rank = self.id_rank[idx]
+        sub.sorted_ids = self.sorted_ids
+        return sub
+
+
+def haversine_m(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distances in metres from (lat, lon) to each (lats[i], lons[i])."""
+    p1 = np.radians(lat)
+    p2 = np.radians(lats.astype(np.float64))
+    dl = np.radians(lons.astype(np.float64) - lon)
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def score_candidates(
+    cols: CandidateColumns,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    skills=(),
+    event_types=(),
+    booking_mode: str | None = None,
+    weights: RankingWeights = RankingWeights(),
+) -> tuple[np.ndarray, np.ndarray]:
+    """(scores, distances_m) for every candidate; candidates outside the radius score -inf."""
+    radius_m = radius_km * 1000
+    distance = haversine_m(lat, lon, cols.lat, cols.lon)
+
+    score = weights.distance * np.clip(1 - distance / radius_m, 0, 1)
+
+    reviews = cols.reviews.astype(np.float64)
+    bayes = (cols.rating * reviews + PRIOR_RATING * PRIOR_REVIEWS) / (reviews + PRIOR_REVIEWS)
+    score += weights.rating * (bayes / 5)
+
+    if skills:
+        want = cols.skill_vocab.encode(skills, cols.skills.shape[1], grow=False)
+        asked = len(set(skills))
+        score += weights.skills * (_popcount(cols.skills & want) / asked)
+    if event_types:
+        want = cols.event_vocab.encode(event_types, cols.events.shape[1], grow=False)
+        asked = len(set(event_types))
+        score += weights.events * (_popcount(cols.events & want) / asked)
+    if booking_mode in _BOOKING_CODES:
+        code = _BOOKING_CODES[booking_mode]
+        score += weights.booking * ((cols.booking == code) | (cols.booking == _BOTH))
+
+    score[distance > radius_m] = -np.inf
+    return score, distance
+
+
+def rank_page(
+    cols: CandidateColumns,
+    scores: np.ndarray,
+    limit: int,
+    after: tuple[float, object] | None = None,
+) -> list[int]:
+    """Indices of the next `limit` + 1 candidates by (score desc, id asc), after the `after` cursor."""
+    keep = np.isfinite(scores)
+    if after is not None:
+        last_score, last_id = after
+        # Rank the cursor id would have, even if that artist has since left the snapshot
+        last_rank = bisect.bisect_right(cols.sorted_ids, last_id) - 1
+        keep &= (scores < last_score) | ((scores == last_score) & (cols.id_rank > last_rank))
+    idx = np.flatnonzero(keep)
+    order = np.lexsort((cols.id_rank[idx], -scores[idx]))[: limit + 1]
+    return idx[order].tolist()
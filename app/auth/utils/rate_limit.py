@@ -0,0 +1,229 @@
+# utils/rate_limit.py
+"""
+Pure-ASGI rate limiting with GCRA (generic cell rate algorithm).
+
+Each (limit, client) pair costs one float - its theoretical arrival time -
+stored in a fixed-capacity LRU table, so a flood of spoofed/sprayed IPs
+evicts old entries instead of growing memory. Checks are O(1).
+
+Usage in routes:
+    from app.auth.utils.rate_limit import rate_limit
+
+    @router.post("/auth/customer/email")
+    @rate_limit("5/minute")
+    async def email_signup(...):
+        ...
+
+Route limits are collected once at startup (RouteLimits.build) from the
+endpoints tagged with @rate_limit; untagged routes get the default limit,
+counted per route like a tagged one (as slowapi's default_limits did), so
+polling one endpoint doesn't use up a client's budget for the others.
+When RATE_LIMIT_STORAGE_URI points at the shared storage
+(utils/rate_limit_storage.py), checks go through it instead so limits hold
+across workers.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from limits.storage import storage_from_string
+from starlette.requests import Request
+
+from app.auth.utils.rate_limit_storage import RATE_LIMIT_STORAGE_URI
+
+_PERIODS = {
+    "second": 1, "seconds": 1,
+    "minute": 60, "minutes": 60,
+    "hour": 3600, "hours": 3600,
+    "day": 86400, "days": 86400,
+}
+
+
+class Rate:
+    """A parsed limit such as "5/minute"."""
+
+    __slots__ = ("text", "count", "period", "emission_interval", "tolerance")
+
+    def __init__(self, text: str):
+        count, _, period = text.strip().partition("/")
+        self.text = text.strip()
+        self.count = int(count)
+        self.period = _PERIODS[period.strip().lower()]
+        # One request every T seconds, with a burst of up to `count` requests
+        self.emission_interval = self.period / self.count
+        self.tolerance = self.emission_interval * (self.count - 1)
+
+    def describe(self) -> str:
+        count, period = self.text.split("/")
+        return f"{count} per 1 {period}"
+
+
+def parse_rates(spec: str) -> tuple:
+    """"5/minute;100/day" -> (Rate, Rate)"""
+    return tuple(Rate(part) for part in spec.split(";") if part.strip())
+
+
+def rate_limit(spec: str):
+    """Tag an endpoint with its limit; enforcement happens in RateLimitMiddleware."""
+    rates = parse_rates(spec)
+
+    def decorator(func):
+        func.__rate_limits__ = rates
+        return func
+    return decorator
+
+
+def client_ip_from_scope(scope) -> str:
+    """Real user IP behind a proxy (Cloud Run / Load Balancer)."""
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def get_real_user_ip(request: Request) -> str:
+    return client_ip_from_scope(request.scope)
+
+
+class GCRATable:
+    """Fixed-capacity LRU table of key -> theoretical arrival time."""
+
+    def __init__(self, capacity: int = 50000):
+        self.capacity = capacity
+        self._tat: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, keys_and_rates) -> float | None:
+        """
+        Admit one request against every (key, rate) pair, all or nothing.
+        Returns None when admitted, else seconds until it would be.
+        """
+        now = time.monotonic()
+        with self._lock:
+            new_tats = []
+            for key, rate in keys_and_rates:
+                tat = max(self._tat.get(key, now), now)
+                allow_at = tat - rate.tolerance
+                if now < allow_at:
+                    return allow_at - now
+                new_tats.append((key, tat + rate.emission_interval))
+            for key, tat in new_tats:
+                self._tat[key] = tat
+                self._tat.move_to_end(key)
+            while len(self._tat) > self.capacity:
+                self._tat.popitem(last=False)
+                self.evictions += 1
+        return None
+
+    async def admit(self, keys_and_rates) -> float | None:
+        """Same as hit(); in-process, so there is nothing to wait for."""
+        return self.hit(keys_and_rates)
+
+    def __len__(self):
+        return len(self._tat)
+
+
+class SharedWindow:
+    """Adapter over the shared moving-window storage (mimora+redis:// etc.)."""
+
+    def __init__(self, uri: str):
+        self.storage = storage_from_string(uri)
+
+    async def admit(self, keys_and_rates) -> float | None:
+        """All rates in one atomic check; None when admitted, else seconds to wait."""
+        # {...} hash tag keeps one client's windows in the same Redis Cluster slot
+        limits = [(f"{{{key[0]}:{key[1]}}}:{rate.text}", rate.count, rate.period) for key, rate in keys_and_rates]
+        retry_after = await self.storage.acquire_entries(limits)
+        return None if retry_after is None else max(1.0, retry_after)
+
+
+class RouteLimits:
+    """(method, path) -> rates lookup, built once from the app's routes."""
+
+    def __init__(self, default: str | None = None):
+        self.default = parse_rates(default) if default else ()
+        self.built = False
+        self._static: dict = {}    # (method, path) -> (limit_id, rates); limit_id is the route path
+        self._dynamic: list = []   # (methods, path_regex, limit_id, rates)
+
+    def build(self, routes) -> None:
+        self._static.clear()
+        self._dynamic.clear()
+        for route in routes:
+            if not hasattr(route, "path"):
+                continue
+            rates = getattr(getattr(route, "endpoint", None), "__rate_limits__", None) or self.default
+            if not rates:
+                continue
+            methods = getattr(route, "methods", None) or {"GET"}
+            entry = (route.path, rates)
+            if "{" in route.path:
+                self._dynamic.append((methods, route.path_regex, *entry))
+            else:
+                for method in methods:
+                    self._static[(method, route.path)] = entry
+        self.built = True
+
+    def lookup(self, method: str, path: str):
+        entry = self._static.get((method, path))
+        if entry is not None:
+            return entry
+        for methods, regex, limit_id, rates in self._dynamic:
+            if method in methods and regex.match(path):
+                return limit_id, rates
+        # Not a known route: each path gets its own default bucket
+        return path, self.default
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing RouteLimits per client IP."""
+
+    def __init__(self, app, route_limits: RouteLimits, capacity: int = 50000, storage_uri: str | None = RATE_LIMIT_STORAGE_URI):
+        self.app = app
+        self.route_limits = route_limits
+        self.backend = (
+            SharedWindow(storage_uri)
+            if storage_uri and storage_uri.startswith("mimora+")
+            else GCRATable(capacity)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        if not self.route_limits.built:
+            self.route_limits.build(scope["app"].routes)
+
+        limit_id, rates = self.route_limits.lookup(scope["method"], scope["path"])
+        if rates:
+            client = client_ip_from_scope(scope)
+            retry_after = await self.backend.admit([((limit_id, client), rate) for rate in rates])
+            if retry_after is not None:
+                await self._reject(send, rates[0], retry_after)
+                return
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, rate: Rate, retry_after: float) -> None:
+        body = json.dumps({"error": f"Rate limit exceeded: {rate.describe()}"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+RATE_LIMIT_TABLE_SIZE = int(os.getenv("RATE_LIMIT_TABLE_SIZE", "50000"))
@@ -0,0 +1,334 @@
+# utils/rate_limit_storage.py
+"""
+Shared rate-limit storage.
+
+By default every uvicorn worker and Cloud Run instance enforces its own
+budget. This module registers a `limits` storage that keeps the counters on
+a Redis-protocol server instead, so "5/minute" holds across all workers.
+RateLimitMiddleware (utils/rate_limit.py) switches to it when configured.
+
+    RATE_LIMIT_STORAGE_URI=mimora+redis://host:6379/0   shared (Redis / Valkey / KeyDB ...)
+    RATE_LIMIT_STORAGE_URI=mimora+memory://             in-process stand-in (tests / local)
+    (unset)                                             per-process GCRA table
+
+All of a request's rates are checked by one atomic Lua script (sorted-set
+sliding logs) that records a hit only if every rate admits it, so a request
+rejected by one rate does not use up the others. Calls go through
+redis.asyncio and never block the event loop.
+
+A small local pre-check leases each process a share of the remaining budget
+after every remote check, so clearly-under-limit keys are admitted without a
+network round trip; locally admitted hits are flushed to the server with the
+next remote check for that key.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from limits.aio.storage import MovingWindowSupport, Storage
+
+# Atomic sliding logs for every rate of one request, all or nothing.
+# KEYS: one sorted set per rate. ARGV[1]: hits to admit; then per key
+# (limit, window ms, previously admitted local hits). Pending local hits are
+# recorded unconditionally; the new ones are added to every key only if they
+# fit under every limit.
+# Returns {index of the first key over its limit (0 = admitted), ms until it
+# frees up, hits in window per key...}.
+_ACQUIRE_LUA = """
+local amount = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local counts = {}
+local blocked = 0
+local retry_ms = 0
+for i, key in ipairs(KEYS) do
+  local limit = tonumber(ARGV[3 * i - 1])
+  local window = tonumber(ARGV[3 * i])
+  local pending = tonumber(ARGV[3 * i + 1])
+  redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+  if pending > 0 then
+    local seq = redis.call('INCRBY', key .. ':seq', pending)
+    for j = 0, pending - 1 do
+      redis.call('ZADD', key, now, seq - j)
+    end
+  end
+  counts[i] = redis.call('ZCARD', key)
+  if blocked == 0 and counts[i] + amount > limit then
+    blocked = i
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    retry_ms = window
+    if #oldest > 0 then
+      retry_ms = tonumber(oldest[2]) + window - now
+    end
+  end
+end
+for i, key in ipairs(KEYS) do
+  local window = tonumber(ARGV[3 * i])
+  if blocked == 0 then
+    local seq = redis.call('INCRBY', key .. ':seq', amount)
+    for j = 0, amount - 1 do
+      redis.call('ZADD', key, now, seq - j)
+    end
+    counts[i] = counts[i] + amount
+  end
+  redis.call('PEXPIRE', key, window)
+  redis.call('PEXPIRE', key .. ':seq', window)
+end
+local result = {blocked, retry_ms}
+for i = 1, #counts do
+  result[i + 2] = counts[i]
+end
+return result
+"""
+
+# Returns {oldest hit in window (ms), hits in window}
+_WINDOW_LUA = """
+local key = KEYS[1]
+local window = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+if #oldest == 0 then
+  return {now, 0}
+end
+return {tonumber(oldest[2]), redis.call('ZCARD', key)}
+"""
+
+
+class RedisBackend:
+    """Counter operations against a Redis-protocol server (redis.asyncio)."""
+
+    def __init__(self, url: str):
+        # Optional dependency - only needed when shared storage is configured
+        import redis.asyncio
+
+        self.client = redis.asyncio.Redis.from_url(url)
+        self._acquire = self.client.register_script(_ACQUIRE_LUA)
+        self._window = self.client.register_script(_WINDOW_LUA)
+
+    async def acquire(self, entries, amount):
+        """entries: [(key, limit, window_ms, pending)] -> (blocked index or 0, retry seconds, counts)."""
+        args = [amount]
+        for _, limit, window_ms, pending in entries:
+            args += [limit, window_ms, pending]
+        blocked, retry_ms, *counts = await self._acquire(keys=[entry[0] for entry in entries], args=args)
+        return int(blocked), int(retry_ms) / 1000, [int(count) for count in counts]
+
+    async def window(self, key, window_ms):
+        oldest_ms, count = await self._window(keys=[key], args=[window_ms])
+        return int(oldest_ms) / 1000, int(count)
+
+    async def incr(self, key, expiry, amount):
+        # SET NX starts the window (and its expiry) only for the first hit
+        async with self.client.pipeline() as pipe:
+            pipe.set(key, 0, ex=expiry, nx=True)
+            pipe.incrby(key, amount)
+            return (await pipe.execute())[1]
+
+    async def get(self, key):
+        return int(await self.client.get(key) or 0)
+
+    async def ttl(self, key):
+        return max(0, await self.client.ttl(key))
+
+    async def delete(self, key):
+        await self.client.delete(key, f"{key}:seq")
+
+    async def clear_all(self, prefix):
+        async for key in self.client.scan_iter(match=f"{prefix}*"):
+            await self.client.delete(key)
+
+    async def ping(self):
+        return await self.client.ping()
+
+
+class InMemoryBackend:
+    """Process-local stand-in with the same semantics as RedisBackend."""
+
+    def __init__(self):
+        self._logs: dict = {}      # key -> deque of hit timestamps (s)
+        self._counters: dict = {}  # key -> [value, expires_at]
+
+    def _trim(self, key, window_s, now):
+        log = self._logs.setdefault(key, deque())
+        while log and log[0] <= now - window_s:
+            log.popleft()
+        return log
+
+    async def acquire(self, entries, amount):
+        now = time.time()
+        logs, blocked, retry_after = [], 0, 0.0
+        for i, (key, limit, window_ms, pending) in enumerate(entries, start=1):
+            log = self._trim(key, window_ms / 1000, now)
+            log.extend([now] * pending)
+            logs.append(log)
+            if not blocked and len(log) + amount > limit:
+                blocked = i
+                retry_after = (log[0] + window_ms / 1000 - now) if log else window_ms / 1000
+        if not blocked:
+            for log in logs:
+                log.extend([now] * amount)
+        return blocked, retry_after, [len(log) for log in logs]
+
+    async def window(self, key, window_ms):
+        now = time.time()
+        log = self._trim(key, window_ms / 1000, now)
+        return (log[0] if log else now), len(log)
+
+    async def incr(self, key, expiry, amount):
+        now = time.time()
+        entry = self._counters.get(key)
+        if entry is None or entry[1] <= now:
+            entry = self._counters[key] = [0, now + expiry]
+        entry[0] += amount
+        return entry[0]
+
+    async def get(self, key):
+        entry = self._counters.get(key)
+        return entry[0] if entry and entry[1] > time.time() else 0
+
+    async def ttl(self, key):
+        entry = self._counters.get(key)
+        return max(0, int(entry[1] - time.time())) if entry else 0
+
+    async def delete(self, key):
+        self._logs.pop(key, None)
+        self._counters.pop(key, None)
+
+    async def clear_all(self, prefix):
+        self._logs.clear()
+        self._counters.clear()
+
+    async def ping(self):
+        return True
+
+
+class _Lease:
+    __slots__ = ("tokens", "expires_at", "pending")
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.pending = 0
+
+
+class SharedStorage(Storage, MovingWindowSupport):
+    """
+    Async `limits` storage backed by RedisBackend (mimora+redis://) or
+    InMemoryBackend (mimora+memory://), with a local lease pre-check.
+
+    Everything runs on the event loop: lease bookkeeping has no await in
+    between reads and writes, and remote checks are awaited, so a request
+    that misses its lease never blocks other requests.
+    """
+
+    STORAGE_SCHEME = ["mimora+redis", "mimora+memory"]
+
+    def __init__(self, uri: str, **options):
+        self.prefix = options.pop("key_prefix", "ratelimit:")
+        # Fraction of the remaining global budget each process may admit locally;
+        # keep it <= 1 / number of processes so the global limit still holds
+        self.local_share = float(options.pop("local_share", os.getenv("RATE_LIMIT_LOCAL_SHARE", "0.1")))
+        self.lease_ttl = float(options.pop("lease_ttl", os.getenv("RATE_LIMIT_LEASE_TTL", "5")))
+        self.max_leases = int(options.pop("max_leases", 10000))
+        super().__init__(uri, **options)
+
+        if uri.startswith("mimora+memory"):
+            self.backend = InMemoryBackend()
+        else:
+            self.backend = RedisBackend("redis" + uri[len("mimora+redis"):])
+
+        self._leases: OrderedDict = OrderedDict()
+        self.local_hits = 0
+        self.remote_checks = 0
+
+    @property
+    def base_exceptions(self):
+        return Exception
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _lease(self, key: str) -> _Lease:
+        lease = self._leases.get(key)
+        if lease is None:
+            lease = self._leases[key] = _Lease()
+            while len(self._leases) > self.max_leases:
+                self._leases.popitem(last=False)
+        self._leases.move_to_end(key)
+        return lease
+
+    # ---- moving window ----
+
+    async def acquire_entries(self, limits, amount: int = 1) -> float | None:
+        """
+        Admit `amount` hits against every (key, limit, expiry) in `limits`,
+        all or nothing. Returns None when admitted, else seconds until the
+        first exhausted window frees up.
+        """
+        now = time.monotonic()
+        leases = [self._leases.get(key) for key, _, _ in limits]
+        if all(lease is not None and lease.expires_at > now and lease.tokens >= amount for lease in leases):
+            # Clearly under every limit: admit locally, flush with the next remote check
+            for lease in leases:
+                lease.tokens -= amount
+                lease.pending += amount
+            self.local_hits += 1
+            return None
+
+        entries = []
+        for (key, limit, expiry), lease in zip(limits, leases):
+            pending = lease.pending if lease is not None else 0
+            if lease is not None:
+                lease.pending = 0
+            entries.append((self._key(key), limit, expiry * 1000, pending))
+
+        blocked, retry_after, counts = await self.backend.acquire(entries, amount)
+        self.remote_checks += 1
+
+        for (key, limit, expiry), count in zip(limits, counts):
+            lease = self._lease(key)
+            lease.tokens = math.floor(max(0, limit - count) * self.local_share)
+            lease.expires_at = now + min(self.lease_ttl, expiry)
+        return None if not blocked else max(retry_after, 0.0)
+
+    async def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        return await self.acquire_entries([(key, limit, expiry)], amount) is None
+
+    async def get_moving_window(self, key: str, limit: int, expiry: int):
+        return await self.backend.window(self._key(key), expiry * 1000)
+
+    # ---- fixed window (used with the default strategy) ----
+
+    async def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        return await self.backend.incr(self._key(key), expiry, amount)
+
+    async def get(self, key: str) -> int:
+        return await self.backend.get(self._key(key))
+
+    async def get_expiry(self, key: str) -> int:
+        return int(time.time() + await self.backend.ttl(self._key(key)))
+
+    async def check(self) -> bool:
+        try:
+            return bool(await self.backend.ping())
+        except Exception:
+            return False
+
+    async def reset(self):
+        await self.backend.clear_all(self.prefix)
+        self._leases.clear()
+
+    async def clear(self, key: str) -> None:
+        await self.backend.delete(self._key(key))
+        self._leases.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"local_hits": self.local_hits, "remote_checks": self.remote_checks, "leases": len(self._leases)}
+
+
+# Unset -> per-process GCRA table in utils/rate_limit.py
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI")
@@ -1,30 +1,43 @@
 # utils/send_email.py
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 import os
 from dotenv import load_dotenv
 
+from app.auth.utils.email_queue import EmailDispatcher, build_transport
+from app.auth.utils.otp import generate_otp, hash_otp, otp_expiry
+from app.auth.utils.otp_store import otp_store
+
 # Load .env from root directory (auto-discovers .env file)
 load_dotenv()
 
 
-SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
-FROM_EMAIL = os.getenv("FROM_EMAIL")
+email_dispatcher = EmailDispatcher(
+    build_transport(),
+    maxsize=int(os.getenv("EMAIL_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("EMAIL_WORKERS", "4")),
+    max_attempts=int(os.getenv("EMAIL_MAX_ATTEMPTS", "5")),
+)
 
 def send_otp_email(to_email: str, otp: str):
-    if not SENDGRID_API_KEY or not FROM_EMAIL:
-        raise ValueError("SendGrid API key or FROM_EMAIL is not loaded from .env")
-
-    message = Mail(
-        from_email=FROM_EMAIL,
-        to_emails=to_email,
+    """Queue the OTP email; delivery happens in the background dispatcher."""
+    email_dispatcher.enqueue(
+        to_email,
         subject="Your Login OTP",
-        html_content=f"""
+        html=f"""
         <p>Your OTP is:</p>
         <h2>{otp}</h2>
         <p>This OTP expires in 5 minutes.</p>
-        """
+        """,
     )
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
-    sg.send(message)
+
+async def send_new_otp(db, audience: str, email: str, username: str) -> None:
+    """
+    Generate an OTP, queue its email, then store its hash.
+
+    The email is queued first: when the queue is full, EmailQueueFull (-> 503)
+    is raised before anything is stored, so the client's retry isn't answered
+    with "OTP already sent" for a code that never went out.
+    """
+    otp = generate_otp()
+    send_otp_email(email, otp)
+    await otp_store.issue(db, audience, email, username, hash_otp(otp), otp_expiry())
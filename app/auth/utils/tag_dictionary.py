@@ -0,0 +1,248 @@
+# utils/tag_dictionary.py
+"""
+Dictionary encoding for the artists' tag arrays.
+
+skills, event_types, profession and travel_willingness repeat the same few
+dozen strings on every row, so they are stored as SMALLINT[] codes into the
+artist_tags table (alembic d0e1f2a3b4c5) instead of VARCHAR[]. The TagCodes
+column type translates list[str] <-> codes through an in-process
+TagDictionary, so ORM objects, card rows and API responses keep seeing
+strings.
+
+- the dictionary is loaded at startup and reloaded every
+  TAG_DICTIONARY_REFRESH_INTERVAL seconds (and by each artist index sync)
+- writers register new values before assigning them:
+
+      await tag_dictionary.ensure(skills=payload.skills, event_types=payload.event_types)
+      artist.skills = payload.skills
+
+  ensure() inserts unknown values in its own committed transaction, so a
+  code never points at a rolled-back row; unused codes are harmless
+- that transaction also NOTIFYs the new (code, attribute, value) rows on
+  TAG_CHANNEL; every worker LISTENs and learns them as the insert commits,
+  i.e. before the writer can store a row that references them
+- a code this process still hasn't seen (a notification lost to a dropped
+  listener) triggers a synchronous reload right there, since result
+  processing can't await; a code that is still unknown afterwards raises
+  UnknownTagCode rather than decoding to a shortened list, so principal
+  snapshots, index rows and cards are never built from a partial decode
+
+Codes are unique across attributes, so a code alone identifies its value.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from sqlalchemy import SmallInteger, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import TypeDecorator
+
+from app.auth.database import AsyncSessionLocal, async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+TAG_TABLE = "artist_tags"
+TAG_ATTRIBUTES = ("skills", "event_types", "profession", "travel_willingness")
+TAG_CHANNEL = "artist_tags"
+_MAX_NOTIFY_PAYLOAD = 7900  # Postgres caps NOTIFY payloads at 8000 bytes
+
+
+class UnknownTag(ValueError):
+    """A tag value was written without being registered through ensure()."""
+
+
+class UnknownTagCode(LookupError):
+    """A stored code is not in artist_tags, even after a reload."""
+
+
+class TagDictionary:
+    """Bidirectional (attribute, value) <-> code map backed by artist_tags."""
+
+    def __init__(self, refresh_interval: float = 300.0):
+        self.refresh_interval = refresh_interval
+        self._codes: dict[tuple[str, str], int] = {}
+        self._values: dict[int, str] = {}
+        self._task: asyncio.Task | None = None
+        self._listener: asyncio.Task | None = None
+        self._notified_load: asyncio.Task | None = None
+        self.misses = 0
+        self.notifications = 0
+
+    def _learn(self, rows) -> None:
+        for code, attribute, value in rows:
+            self._codes[(attribute, value)] = code
+            self._values[code] = value
+
+    # ---- encoding ----
+
+    def encode(self, attribute: str, values) -> list[int]:
+        """Codes for `values`; every value must already be registered."""
+        try:
+            return [self._codes[(attribute, value)] for value in values]
+        except KeyError as e:
+            raise UnknownTag(
+                f"{attribute} value {e.args[0][1]!r} is not registered; await tag_dictionary.ensure() first"
+            ) from None
+
+    def lookup(self, attribute: str, values) -> list[int | None]:
+        """Codes for `values`, None for values nobody has registered."""
+        return [self._codes.get((attribute, value)) for value in values]
+
+    def decode(self, codes) -> list[str]:
+        """Values for `codes`, all or nothing: raises UnknownTagCode rather than dropping one."""
+        try:
+            return [self._values[code] for code in codes]
+        except KeyError:
+            pass
+        # Never skipped: a valid row must not fail just because another code missed recently
+        self.misses += 1
+        self._load_sync()
+        missing = [code for code in codes if code not in self._values]
+        if missing:
+            raise UnknownTagCode(f"Tag codes {missing} are not in {TAG_TABLE}")
+        return [self._values[code] for code in codes]
+
+    # ---- registration / loading ----
+
+    async def ensure(self, **tags) -> None:
+        """Register every value in `tags` (attribute=[values]) this process has no code for."""
+        missing = {
+            (attribute, value)
+            for attribute, values in tags.items()
+            for value in values or ()
+            if (attribute, value) not in self._codes
+        }
+        if not missing:
+            return
+        unknown = {attribute for attribute, _ in missing} - set(TAG_ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Not a tag attribute: {', '.join(sorted(unknown))}")
+
+        attributes, values = (list(column) for column in zip(*missing))
+        pairs = "unnest(CAST(:attributes AS varchar[]), CAST(:values AS varchar[]))"
+        params = {"attributes": attributes, "values": values}
+        async with AsyncSessionLocal() as db:
+            await db.execute(text(
+                f"INSERT INTO {TAG_TABLE} (attribute, value) SELECT * FROM {pairs} "
+                f"ON CONFLICT (attribute, value) DO NOTHING"
+            ), params)
+            rows = (await db.execute(text(
+                f"SELECT t.id, t.attribute, t.value FROM {TAG_TABLE} AS t "
+                f"JOIN {pairs} AS m(attribute, value) USING (attribute, value)"
+            ), params)).all()
+            # Delivered to every listening worker when this transaction commits
+            await db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {"channel": TAG_CHANNEL, "payload": _notify_payload(rows)})
+            await db.commit()
+        self._learn(rows)
+
+    async def load(self) -> None:
+        """(Re)load the whole dictionary; it is a few dozen rows."""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(text(f"SELECT id, attribute, value FROM {TAG_TABLE}"))).all()
+        self._learn(rows)
+
+    def _load_sync(self) -> None:
+        """Blocking reload for decode().
+
+        Only reached when a code slipped past the LISTEN channel (e.g. while
+        the listener was reconnecting), so the blocking round trip is rare.
+        """
+        with engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT id, attribute, value FROM {TAG_TABLE}")).all()
+        self._learn(rows)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.notifications += 1
+        try:
+            self._learn(json.loads(payload))
+        except ValueError:
+            # Payload too large to send: reload instead
+            if self._notified_load is None or self._notified_load.done():
+                self._notified_load = asyncio.create_task(self._safe_load())
+
+    async def _listen(self) -> None:
+        """LISTEN on TAG_CHANNEL, reconnecting if the connection drops."""
+        while True:
+            try:
+                async with async_engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    lost = asyncio.Event()
+                    raw.add_termination_listener(lambda _: lost.set())
+                    await raw.add_listener(TAG_CHANNEL, self._on_notify)
+                    try:
+                        # Anything registered while we weren't listening
+                        await self._safe_load()
+                        await lost.wait()
+                    finally:
+                        if not raw.is_closed():
+                            await raw.remove_listener(TAG_CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Tag dictionary listener failed: {e}")
+            await asyncio.sleep(5.0)
+
+    async def _safe_load(self) -> None:
+        try:
+            await self.load()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Tag dictionary load failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self._safe_load()
+
+    async def start(self) -> None:
+        """Load the dictionary, then keep it current (idempotent)."""
+        if self._task is None or self._task.done():
+            await self._safe_load()
+            self._task = asyncio.create_task(self._run())
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._listener):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._listener = None
+
+    def stats(self) -> dict:
+        return {"tags": len(self._codes), "misses": self.misses, "notifications": self.notifications}
+
+
+def _notify_payload(rows) -> str:
+    """JSON [[code, attribute, value], ...], or "" (reload) when too large for NOTIFY."""
+    payload = json.dumps([list(row) for row in rows])
+    return payload if len(payload.encode()) <= _MAX_NOTIFY_PAYLOAD else ""
+
+
+class TagCodes(TypeDecorator):
+    """list[str] in Python, SMALLINT[] codes from `tag_dictionary` in the database."""
+
+    impl = ARRAY(SmallInteger)
+    cache_ok = True
+
+    def __init__(self, attribute: str):
+        super().__init__()
+        self.attribute = attribute
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else tag_dictionary.encode(self.attribute, value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else tag_dictionary.decode(value)
+
+
+tag_dictionary = TagDictionary(
+    refresh_interval=float(os.getenv("TAG_DICTIONARY_REFRESH_INTERVAL", "300")),
+)
@@ -0,0 +1,70 @@
+# utils/token_cache.py
+"""
+In-process LRU cache of verified token claims.
+
+Entries are keyed by the SHA-256 digest of the raw token (the token itself is
+never stored) and expire at the token's own `exp` claim, so a cached entry can
+never outlive the token it came from.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """Bounded, exp-aware LRU cache of decoded token claims."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()  # digest -> (exp, claims)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        """Return cached claims for `token`, or None on miss/expiry."""
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            exp, claims = entry
+            if exp <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Hand out a copy so callers can't mutate the cached claims
+        return dict(claims)
+
+    def put(self, token: str, claims: dict) -> None:
+        """Cache `claims` until their `exp`; tokens without exp are not cached."""
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= time.time() or self.maxsize <= 0:
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (exp, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
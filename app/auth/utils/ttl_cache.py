@@ -0,0 +1,94 @@
+# utils/ttl_cache.py
+"""
+In-process LRU + TTL cache for results of slow upstream calls.
+
+- entries expire `ttl` seconds after they were fetched; the least recently
+  used one is evicted past `maxsize`
+- concurrent misses for the same key share one fetch (single-flight)
+- if a fetch fails, an expired entry younger than `stale_ttl` is served
+  instead of the error (stale-if-error); 0 disables that
+
+Used by reverse geocoding (utils/geocode.py) and artist search
+(utils/artist_search.py).
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """LRU + TTL cache with single-flight fills and stale-if-error."""
+
+    def __init__(self, name: str, maxsize: int = 20000, ttl: float = 86400, stale_ttl: float = 0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self._entries: OrderedDict = OrderedDict()  # key -> (fetched_at, value)
+        self._inflight: dict = {}                   # key -> asyncio.Task
+
+    async def get_or_fetch(self, key, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        """Return the cached value for `key`, calling `fetch()` at most once per miss."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fill(key, fetch))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+
+        try:
+            # Shielded so one cancelled client doesn't abort the fill for the others
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.stale_ttl:
+                self.stale_served += 1
+                return entry[1]
+            raise
+
+    async def _fill(self, key, fetch) -> dict:
+        try:
+            value = await fetch()
+        except Exception as e:
+            logger.warning("%s upstream failed for %s: %s", self.name, key, e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,227 @@
+# utils/upstream_scheduler.py
+"""
+Client-side pacing for rate-limited upstreams (Nominatim allows 1 req/s).
+
+Calls are submitted to an UpstreamScheduler instead of being made directly:
+
+- a token bucket caps how fast calls start (rate, burst)
+- a bounded priority queue holds the rest; INTERACTIVE jobs go ahead of
+  BACKGROUND ones and can evict them when the queue is full
+- a job whose deadline can't be met is rejected up front (estimated wait too
+  long) or dropped when it reaches the head of the queue too late, instead
+  of being sent upstream after the client has given up
+- backoff() pauses the bucket when the upstream answers 429
+
+Rejections raise UpstreamBusy with a retry_after hint, so callers can answer
+503 + Retry-After rather than surfacing the upstream's throttling as a 502.
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class UpstreamBusy(RuntimeError):
+    """The scheduler can't get this call to the upstream in time."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "deadline", "enqueued_at", "fn", "future")
+
+    def __init__(self, priority, seq, deadline, enqueued_at, fn, future):
+        self.priority = priority
+        self.seq = seq
+        self.deadline = deadline
+        self.enqueued_at = enqueued_at
+        self.fn = fn
+        self.future = future
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class UpstreamScheduler:
+    """Token bucket + bounded priority queue in front of one upstream."""
+
+    def __init__(self, name: str, rate: float = 1.0, burst: int = 1, max_queue: int = 50):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self._queue: list[_Job] = []  # sorted by (priority, seq)
+        self._seq = itertools.count()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        # metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.dropped_deadline = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---- token bucket ----
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _token_wait(self, now: float) -> float:
+        """Seconds until the next call may start."""
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _estimated_wait(self, now: float, ahead: int) -> float:
+        """Rough wait for a job with `ahead` jobs in front of it."""
+        self._refill(now)
+        pause = max(0.0, self._paused_until - now)
+        return pause + max(0.0, (ahead + 1 - self._tokens) / self.rate)
+
+    def backoff(self, seconds: float) -> None:
+        """Stop starting calls for `seconds` (e.g. after an upstream 429)."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+        logger.warning(f"{self.name}: upstream throttled us, pausing for {seconds:.1f}s")
+
+    # ---- queue ----
+
+    async def submit(self, fn: Callable[[], Awaitable], priority: int = INTERACTIVE, timeout: float = 5.0):
+        """Run `fn()` once the bucket allows it; raises UpstreamBusy if it can't start within `timeout`."""
+        self._ensure_started()
+        now = time.monotonic()
+        self.submitted += 1
+
+        ahead = sum(1 for job in self._queue if job.priority <= priority)
+        wait = self._estimated_wait(now, ahead)
+        if wait > timeout:
+            self.rejected += 1
+            raise UpstreamBusy(f"{self.name} is busy", retry_after=wait)
+
+        if len(self._queue) >= self.max_queue:
+            worst = self._queue[-1]  # kept sorted, so the last job is the lowest priority
+            if worst.priority <= priority:
+                self.rejected += 1
+                raise UpstreamBusy(f"{self.name} queue is full", retry_after=wait)
+            # Make room by dropping the newest lower-priority job
+            self._queue.remove(worst)
+            self._fail(worst, UpstreamBusy(f"{self.name} queue is full", retry_after=wait))
+            self.evicted += 1
+
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(priority, next(self._seq), now + timeout, now, fn, future)
+        # A sorted list rather than a heap: queues are small and eviction needs the tail
+        bisect.insort(self._queue, job)
+        self._wakeup.set()
+        return await future
+
+    @staticmethod
+    def _fail(job: _Job, exc: Exception) -> None:
+        if not job.future.done():
+            job.future.set_exception(exc)
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._token_wait(time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            job = self._queue.pop(0)
+            if job.future.done():  # caller went away
+                continue
+            now = time.monotonic()
+            if now >= job.deadline:
+                self.dropped_deadline += 1
+                self._fail(job, UpstreamBusy(f"{self.name} deadline exceeded in queue", retry_after=1 / self.rate))
+                continue
+
+            self._tokens -= 1
+            waited = now - job.enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: _Job) -> None:
+        try:
+            result = await job.fn()
+        except Exception as e:
+            self.failed += 1
+            self._fail(job, e)
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    async def start(self) -> None:
+        """Start the dispatcher (idempotent; submit() also starts it lazily)."""
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Stop dispatching and fail anything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        queue, self._queue = self._queue, []
+        for job in queue:
+            self._fail(job, UpstreamBusy(f"{self.name} scheduler stopped", retry_after=1.0))
+
+    def stats(self) -> dict:
+        dispatched = self.completed + self.failed + len(self._running)
+        return {
+            "queued": len(self._queue),
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "dropped_deadline": self.dropped_deadline,
+            "avg_queue_wait_ms": round(self._wait_total / dispatched * 1000, 2) if dispatched else 0.0,
+            "max_queue_wait_ms": round(self._wait_max * 1000, 2),
+        }
+
+
+def retry_after_header(exc: UpstreamBusy) -> dict:
+    """Retry-After header (whole seconds, at least 1) for an UpstreamBusy."""
+    return {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
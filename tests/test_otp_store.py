@@ -0,0 +1,85 @@
+"""KeyValueOTPStore against the in-process InMemoryKV stand-in."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.auth.utils import otp as otp_utils
+from app.auth.utils.otp_store import InMemoryKV, KeyValueOTPStore, OTPStore, OTPVerificationError
+
+EMAIL = "Asha@Example.com"
+
+
+@pytest.fixture(autouse=True)
+def pepper(monkeypatch):
+    monkeypatch.setattr(otp_utils, "OTP_PEPPER", "test-pepper")
+
+
+@pytest.fixture
+def store():
+    return KeyValueOTPStore(InMemoryKV())
+
+
+def issue(store, code="123456", expires_in=timedelta(minutes=5), username="asha"):
+    expires_at = datetime.utcnow() + expires_in
+    return store.issue(None, "customer", EMAIL, username, otp_utils.hash_otp(code), expires_at)
+
+
+def consume(store, code, email=EMAIL):
+    return store.consume(None, "customer", email, code)
+
+
+def test_issue_then_consume(store):
+    async def scenario():
+        await issue(store)
+        # Keys are case-insensitive on the email
+        assert await consume(store, "123456", email=EMAIL.lower()) == "asha"
+
+    asyncio.run(scenario())
+
+
+def test_wrong_code_keeps_the_otp(store):
+    async def scenario():
+        await issue(store)
+        with pytest.raises(OTPVerificationError, match="Invalid OTP"):
+            await consume(store, "000000")
+        assert await consume(store, "123456") == "asha"
+
+    asyncio.run(scenario())
+
+
+def test_expired_otp_is_rejected(store):
+    async def scenario():
+        await issue(store, expires_in=timedelta(seconds=-1))
+        with pytest.raises(OTPVerificationError, match="OTP expired"):
+            await consume(store, "123456")
+
+    asyncio.run(scenario())
+
+
+def test_otp_is_single_use(store):
+    async def scenario():
+        await issue(store)
+        assert await consume(store, "123456") == "asha"
+        with pytest.raises(OTPVerificationError, match="OTP not found"):
+            await consume(store, "123456")
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_consumes_admit_one(store):
+    async def scenario():
+        await issue(store)
+        results = await asyncio.gather(
+            consume(store, "123456"), consume(store, "123456"), return_exceptions=True
+        )
+        assert results.count("asha") == 1
+        assert sum(isinstance(r, OTPVerificationError) for r in results) == 1
+
+    asyncio.run(scenario())
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        OTPStore()
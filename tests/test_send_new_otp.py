@@ -0,0 +1,57 @@
+"""send_new_otp must not start the resend cooldown when the email can't be queued."""
+
+import asyncio
+
+import pytest
+
+from app.auth.utils import otp as otp_utils
+from app.auth.utils import send_email
+from app.auth.utils.email_queue import EmailDispatcher, EmailQueueFull
+from app.auth.utils.otp_store import InMemoryKV, KeyValueOTPStore
+
+EMAIL = "asha@example.com"
+
+
+class _NullTransport:
+    async def send(self, message):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def pepper(monkeypatch):
+    monkeypatch.setattr(otp_utils, "OTP_PEPPER", "test-pepper")
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = KeyValueOTPStore(InMemoryKV())
+    monkeypatch.setattr(send_email, "otp_store", store)
+    return store
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    # No workers, so nothing drains the single slot
+    dispatcher = EmailDispatcher(_NullTransport(), maxsize=1, workers=0)
+    monkeypatch.setattr(send_email, "email_dispatcher", dispatcher)
+    return dispatcher
+
+
+def test_queued_otp_starts_the_cooldown(store, dispatcher):
+    async def scenario():
+        await send_email.send_new_otp(None, "customer", EMAIL, "asha")
+        assert dispatcher.enqueued == 1
+        assert await store.resend_after(None, "customer", EMAIL, "asha")
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_does_not_start_the_cooldown(store, dispatcher):
+    async def scenario():
+        dispatcher.enqueue("someone@example.com", "Your Login OTP", "<p>taken</p>")
+        with pytest.raises(EmailQueueFull):
+            await send_email.send_new_otp(None, "customer", EMAIL, "asha")
+        assert await store.latest_active(None, "customer", EMAIL) is None
+        assert await store.resend_after(None, "customer", EMAIL, "asha") is None
+
+    asyncio.run(scenario())